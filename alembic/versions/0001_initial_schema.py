@@ -0,0 +1,64 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ticket_status = sa.Enum('OPEN', 'IN_PROGRESS', 'RESOLVED', 'CLOSED', name='ticketstatus')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'users',
+        sa.Column('first_name', sa.String(length=50), nullable=False),
+        sa.Column('last_name', sa.String(length=50), nullable=False),
+        sa.Column('email', sa.String(length=100), nullable=False),
+        sa.Column('hashed_password', sa.String(length=128), nullable=False),
+        sa.Column('is_activated', sa.Boolean(), nullable=True),
+        sa.Column('last_login', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('role', sa.String(length=20), nullable=False),
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email'),
+    )
+    op.create_table(
+        'tickets',
+        sa.Column('title', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('status', ticket_status, nullable=False),
+        sa.Column('customer_id', sa.String(length=36), nullable=False),
+        sa.Column('agent_id', sa.String(length=36), nullable=True),
+        sa.Column('resolution_notes', sa.String(), nullable=True),
+        sa.Column('embed_token', sa.String(), nullable=False),
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['agent_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['customer_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('embed_token'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('tickets')
+    op.drop_table('users')
+    ticket_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,59 @@
+"""Add ticket listing indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside a transaction; build without locking out writers
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tickets_agent_created',
+            'tickets',
+            ['agent_id', 'created_at', 'id'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_tickets_agent_status_created',
+            'tickets',
+            ['agent_id', 'status', 'created_at', 'id'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_tickets_customer_created',
+            'tickets',
+            ['customer_id', 'created_at', 'id'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_tickets_open_created',
+            'tickets',
+            ['created_at', 'id'],
+            postgresql_where=sa.text("status = 'OPEN'"),
+            sqlite_where=sa.text("status = 'OPEN'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tickets_open_created', table_name='tickets', postgresql_concurrently=True)
+        op.drop_index('ix_tickets_customer_created', table_name='tickets', postgresql_concurrently=True)
+        op.drop_index('ix_tickets_agent_status_created', table_name='tickets', postgresql_concurrently=True)
+        op.drop_index('ix_tickets_agent_created', table_name='tickets', postgresql_concurrently=True)
@@ -0,0 +1,48 @@
+"""Add ticket full-text search vector
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.ticket import TICKET_SEARCH_DOCUMENT
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Other databases fall back to the application's in-memory index
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(
+        "ALTER TABLE tickets ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({TICKET_SEARCH_DOCUMENT}) STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tickets_search_vector',
+            'tickets',
+            [sa.text('search_vector')],
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tickets_search_vector', table_name='tickets', postgresql_concurrently=True)
+    op.drop_column('tickets', 'search_vector')
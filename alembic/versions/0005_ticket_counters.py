@@ -0,0 +1,43 @@
+"""Add ticket counters
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ticket_status = sa.Enum('OPEN', 'IN_PROGRESS', 'RESOLVED', 'CLOSED', name='ticketstatus', create_type=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'ticket_counters',
+        sa.Column('status', ticket_status, nullable=False),
+        sa.Column('agent_id', sa.String(length=36), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('status', 'agent_id', 'shard'),
+    )
+    # Seed from the existing tickets; from here on the application keeps them current
+    op.execute(
+        "INSERT INTO ticket_counters (status, agent_id, shard, count) "
+        "SELECT status, coalesce(agent_id, ''), 0, count(*) FROM tickets GROUP BY status, coalesce(agent_id, '')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('ticket_counters')
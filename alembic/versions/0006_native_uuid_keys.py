@@ -0,0 +1,75 @@
+"""Store keys as native uuid
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, column, nullable, previous type)
+UUID_COLUMNS = [
+    ('users', 'id', False, sa.String(length=36)),
+    ('tickets', 'id', False, sa.String(length=36)),
+    ('tickets', 'customer_id', False, sa.String(length=36)),
+    ('tickets', 'agent_id', True, sa.String(length=36)),
+    ('tickets', 'embed_token', False, sa.String()),
+    ('outbox_events', 'id', False, sa.String(length=36)),
+    ('outbox_events', 'ticket_id', False, sa.String(length=36)),
+]
+
+TICKET_FOREIGN_KEYS = [
+    ('tickets_customer_id_fkey', 'customer_id'),
+    ('tickets_agent_id_fkey', 'agent_id'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite keeps 36-character text keys; only Postgres has a native uuid type
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # Both sides of a foreign key must change type together, so drop and re-add them.
+    # Existing uuid4 text converts as-is; the cast fails loudly on anything malformed.
+    for name, _ in TICKET_FOREIGN_KEYS:
+        op.drop_constraint(name, 'tickets', type_='foreignkey')
+    for table, column, nullable, _ in UUID_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=postgresql.UUID(),
+            existing_nullable=nullable,
+            postgresql_using=f'{column}::uuid',
+        )
+    for name, column in TICKET_FOREIGN_KEYS:
+        op.create_foreign_key(name, 'tickets', 'users', [column], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name, _ in TICKET_FOREIGN_KEYS:
+        op.drop_constraint(name, 'tickets', type_='foreignkey')
+    for table, column, nullable, previous in UUID_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=previous,
+            existing_nullable=nullable,
+            postgresql_using=f'{column}::text',
+        )
+    for name, column in TICKET_FOREIGN_KEYS:
+        op.create_foreign_key(name, 'tickets', 'users', [column], ['id'])
@@ -0,0 +1,39 @@
+"""Add ticket body store
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'ticket_blobs',
+        sa.Column('digest', sa.String(length=64), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('digest'),
+    )
+    # Existing bodies stay inline; only bodies written from now on are offloaded
+    op.add_column('tickets', sa.Column('description_blob', sa.String(length=64), nullable=True))
+    op.add_column('tickets', sa.Column('resolution_notes_blob', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Offloaded bodies are dropped with the table; their tickets keep only the inline preview
+    op.drop_column('tickets', 'resolution_notes_blob')
+    op.drop_column('tickets', 'description_blob')
+    op.drop_table('ticket_blobs')
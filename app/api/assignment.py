@@ -0,0 +1,99 @@
+import asyncio
+import heapq
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ticket import TicketCounter, TicketStatus, User
+from config import settings
+
+# Tickets in these states count towards an agent's workload
+ACTIVE_STATUSES = (TicketStatus.OPEN, TicketStatus.IN_PROGRESS)
+
+
+class NoAgentsAvailable(Exception):
+    """Raised when auto-assignment finds no active agents"""
+
+
+class AgentLoadBalancer:
+    """Min-heap of agents keyed on active ticket count, for least-loaded assignment.
+
+    Heap entries are (load, agent_id) snapshots; changing a load pushes a new
+    entry and stale ones are skipped when popped. Loads are seeded from the
+    ticket counters, follow this worker's ticket writes through apply(), and
+    are reloaded every refresh_seconds to pick up other workers' writes and
+    new agents. Only touched from the event loop thread.
+    """
+
+    def __init__(self, refresh_seconds: float = 30.0, clock=time.monotonic):
+        self.refresh_seconds = refresh_seconds
+        self._clock = clock
+        self.loads: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+        self._reserved: Counter = Counter()
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def set_loads(self, loads: Dict[str, int]) -> None:
+        """Replace the known agents and their loads, keeping in-flight reservations"""
+        self.loads = {agent_id: load + self._reserved[agent_id] for agent_id, load in loads.items()}
+        self._heap = [(load, agent_id) for agent_id, load in self.loads.items()]
+        heapq.heapify(self._heap)
+        self._loaded_at = self._clock()
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        """Reload agent loads when they were never loaded or are older than refresh_seconds"""
+        if self._loaded_at is not None and self._clock() - self._loaded_at < self.refresh_seconds:
+            return
+        async with self._lock:
+            if self._loaded_at is not None and self._clock() - self._loaded_at < self.refresh_seconds:
+                return
+            agents = await db.execute(select(User.id).where(User.role == "agent", User.is_activated.is_not(False)))
+            counts = await db.execute(
+                select(TicketCounter.agent_id, func.sum(TicketCounter.count))
+                .where(TicketCounter.status.in_(ACTIVE_STATUSES), TicketCounter.agent_id != "")
+                .group_by(TicketCounter.agent_id)
+            )
+            active = dict(counts.all())
+            self.set_loads({agent_id: int(active.get(agent_id) or 0) for agent_id in agents.scalars().all()})
+
+    def _adjust(self, agent_id: str, delta: int) -> None:
+        if agent_id not in self.loads:
+            return
+        self.loads[agent_id] += delta
+        heapq.heappush(self._heap, (self.loads[agent_id], agent_id))
+        # Compact once stale entries dominate the heap
+        if len(self._heap) > 4 * len(self.loads) + 64:
+            self._heap = [(load, agent_id) for agent_id, load in self.loads.items()]
+            heapq.heapify(self._heap)
+
+    def reserve(self) -> str:
+        """Pick the least-loaded agent and count the pending assignment against them"""
+        while self._heap:
+            load, agent_id = self._heap[0]
+            if self.loads.get(agent_id) == load:
+                self._reserved[agent_id] += 1
+                self._adjust(agent_id, 1)
+                return agent_id
+            heapq.heappop(self._heap)
+        raise NoAgentsAvailable("No active agents to assign tickets to")
+
+    def release(self, *agent_ids: str) -> None:
+        """Drop reservations once the assignment committed (apply() then counts it) or failed"""
+        for agent_id in agent_ids:
+            if self._reserved[agent_id] > 0:
+                self._reserved[agent_id] -= 1
+                self._adjust(agent_id, -1)
+
+    def apply(self, deltas: Counter) -> None:
+        """Follow committed ticket counter changes keyed by (status, agent_id)"""
+        for (status, agent_id), delta in deltas.items():
+            if agent_id and status in ACTIVE_STATUSES and delta:
+                self._adjust(agent_id, delta)
+
+
+# Global instance
+load_balancer = AgentLoadBalancer(refresh_seconds=settings.auto_assign_refresh_seconds)
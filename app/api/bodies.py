@@ -0,0 +1,188 @@
+import abc
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import zlib
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.stats import dialect_name
+from app.models.ticket import TicketBlob
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Ticket columns that may be moved out of the row; each has a <field>_blob reference column
+BODY_FIELDS = ("description", "resolution_notes")
+
+_RAW = b"r"
+_ZLIB = b"z"
+
+
+def body_digest(text: str) -> str:
+    """Content address of a body; identical bodies share one stored copy"""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def encode_body(text: str, compress: bool = True) -> bytes:
+    """Stored form of a body, zlib-compressed when that makes it smaller"""
+    data = text.encode()
+    if compress:
+        packed = zlib.compress(data, 6)
+        if len(packed) < len(data):
+            return _ZLIB + packed
+    return _RAW + data
+
+
+def decode_body(blob: bytes) -> str:
+    encoding, data = blob[:1], blob[1:]
+    if encoding == _ZLIB:
+        data = zlib.decompress(data)
+    elif encoding != _RAW:
+        raise ValueError(f"Unknown body encoding {encoding!r}")
+    return data.decode()
+
+
+def preview(text: str, max_bytes: int) -> str:
+    """Longest prefix of text that fits in max_bytes of UTF-8"""
+    return text.encode()[:max_bytes].decode(errors="ignore")
+
+
+class BodyStore(abc.ABC):
+    """Where offloaded ticket bodies live, as encoded bytes keyed by digest"""
+
+    @abc.abstractmethod
+    async def put(self, db: AsyncSession, blobs: Dict[str, bytes]) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def get(self, db: AsyncSession, digests: Iterable[str]) -> Dict[str, bytes]:
+        ...
+
+
+class DatabaseBodyStore(BodyStore):
+    """Bodies in the ticket_blobs table, written in the same transaction as the ticket"""
+
+    async def put(self, db: AsyncSession, blobs: Dict[str, bytes]) -> None:
+        if not blobs:
+            return
+        insert = sqlite.insert if dialect_name(db) == "sqlite" else postgresql.insert
+        rows = [{"digest": digest, "data": data} for digest, data in sorted(blobs.items())]
+        await db.execute(insert(TicketBlob).values(rows).on_conflict_do_nothing(index_elements=[TicketBlob.digest]))
+
+    async def get(self, db: AsyncSession, digests: Iterable[str]) -> Dict[str, bytes]:
+        digests = list(digests)
+        if not digests:
+            return {}
+        result = await db.execute(select(TicketBlob.digest, TicketBlob.data).where(TicketBlob.digest.in_(digests)))
+        return {digest: data for digest, data in result.all()}
+
+
+class FileBodyStore(BodyStore):
+    """Bodies as files under root, a local stand-in for an object store.
+
+    Files are written atomically before the ticket row commits, so a rolled
+    back write can leave an unreferenced file behind but never a dangling
+    reference.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def _write(self, digest: str, data: bytes) -> None:
+        path = self._path(digest)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _read(self, digests) -> Dict[str, bytes]:
+        found = {}
+        for digest in digests:
+            try:
+                with open(self._path(digest), "rb") as f:
+                    found[digest] = f.read()
+            except FileNotFoundError:
+                pass
+        return found
+
+    async def put(self, db: AsyncSession, blobs: Dict[str, bytes]) -> None:
+        for digest, data in blobs.items():
+            await asyncio.to_thread(self._write, digest, data)
+
+    async def get(self, db: AsyncSession, digests: Iterable[str]) -> Dict[str, bytes]:
+        return await asyncio.to_thread(self._read, list(digests))
+
+
+def build_body_store(url: str) -> BodyStore:
+    """Body store for a ticket_body_store setting: "database" or file:///path/to/dir"""
+    if url == "database":
+        return DatabaseBodyStore()
+    if url.startswith("file://"):
+        return FileBodyStore(url[len("file://"):])
+    raise ValueError(f"Unsupported ticket body store: {url!r}")
+
+
+class TicketBodyService:
+    """Moves ticket bodies over inline_max_bytes out of the tickets table and back for detail views"""
+
+    def __init__(self, store: Optional[BodyStore] = None, inline_max_bytes: int = 8192, compress: bool = True):
+        self.store = store or build_body_store(settings.ticket_body_store)
+        self.inline_max_bytes = inline_max_bytes
+        self.compress = compress
+
+    async def offload(self, db: AsyncSession, rows: Iterable[dict]) -> None:
+        """Rewrite ticket column values in place, storing large bodies and keeping a preview inline"""
+        blobs: Dict[str, bytes] = {}
+        for values in rows:
+            for field in BODY_FIELDS:
+                if field not in values:
+                    continue
+                text = values[field]
+                # Always set the reference so a replaced large body does not leave a stale one behind
+                values[f"{field}_blob"] = None
+                if text is None or len(text.encode()) <= self.inline_max_bytes:
+                    continue
+                digest = body_digest(text)
+                if digest not in blobs:
+                    blobs[digest] = encode_body(text, self.compress)
+                values[field] = preview(text, self.inline_max_bytes)
+                values[f"{field}_blob"] = digest
+        await self.store.put(db, blobs)
+
+    async def load(self, db: AsyncSession, ticket) -> Dict[str, str]:
+        """Full text of the ticket's offloaded bodies by field; the ticket must have its bodies undeferred"""
+        refs = {field: getattr(ticket, f"{field}_blob") for field in BODY_FIELDS}
+        refs = {field: digest for field, digest in refs.items() if digest}
+        if not refs:
+            return {}
+        found = await self.store.get(db, set(refs.values()))
+        bodies = {}
+        for field, digest in refs.items():
+            if digest in found:
+                bodies[field] = decode_body(found[digest])
+            else:
+                logger.warning("Body %s of ticket %s is missing from the store; serving the preview", digest, ticket.id)
+        return bodies
+
+
+# Global instance
+body_service = TicketBodyService(
+    inline_max_bytes=settings.ticket_body_inline_max_bytes,
+    compress=settings.ticket_body_compress,
+)
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy.engine import make_url
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+EVENT_FIELDS = ("id", "title", "status", "customer_id", "agent_id", "created_at", "updated_at")
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+NOTIFY_PAYLOAD_LIMIT = 7900
+
+
+def ticket_event(event_type: str, ticket) -> Dict[str, Any]:
+    """JSON-ready change event for a ticket; carries the fields dashboards filter and render on"""
+    data = {}
+    for field in EVENT_FIELDS:
+        value = getattr(ticket, field, None)
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        elif hasattr(value, "value"):
+            value = value.value
+        data[field] = value
+    return {"type": f"ticket.{event_type}", "ticket": data}
+
+
+def notify_payloads(events: Iterable[Dict[str, Any]]) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """Pack events into JSON array payloads that each fit in one NOTIFY, with the events in each"""
+    batch: List[Dict[str, Any]] = []
+    encoded: List[str] = []
+    size = 2
+    for event in events:
+        # ASCII-only JSON, so characters are bytes
+        item = json.dumps(event)
+        if encoded and size + len(item) + 1 > NOTIFY_PAYLOAD_LIMIT:
+            yield "[" + ",".join(encoded) + "]", batch
+            batch, encoded, size = [], [], 2
+        batch.append(event)
+        encoded.append(item)
+        size += len(item) + 1
+    if encoded:
+        yield "[" + ",".join(encoded) + "]", batch
+
+
+class Subscription:
+    """One subscriber's bounded queue of events matching its filters"""
+
+    def __init__(self, bus: "EventBus", filters: Dict[str, Optional[str]], max_queue: int):
+        self.bus = bus
+        self.filters = {field: value for field, value in filters.items() if value is not None}
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.dropped = 0
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        ticket = event["ticket"]
+        return all(ticket.get(field) == value for field, value in self.filters.items())
+
+    def put(self, event: Dict[str, Any]) -> None:
+        # A slow consumer loses its oldest events rather than holding up publishers
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next event, or None when nothing arrives within timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.bus.subscribers.discard(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class PostgresNotifyBridge:
+    """Fans events out to every worker through Postgres LISTEN/NOTIFY.
+
+    Holds one dedicated asyncpg connection outside the engine's pool and
+    reconnects with backoff if it drops.
+    """
+
+    def __init__(self, bus: "EventBus", database_url: str, channel: str):
+        self.bus = bus
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.channel = channel
+        self.connection = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            events = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed ticket event payload")
+            return
+        for event in events if isinstance(events, list) else [events]:
+            self.bus.deliver(event)
+
+    async def _run(self) -> None:
+        import asyncpg
+
+        backoff = 1.0
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(self.channel, self._on_notify)
+                self.connection = connection
+                backoff = 1.0
+                try:
+                    await closed.wait()
+                finally:
+                    self.connection = None
+                    if not connection.is_closed():
+                        await connection.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Ticket event listener disconnected, retrying in %.0fs", backoff, exc_info=True)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    async def notify(self, payload: str) -> bool:
+        """Send a payload to every listening worker; False if it could not be sent"""
+        connection = self.connection
+        if connection is None or len(payload.encode()) > NOTIFY_PAYLOAD_LIMIT:
+            return False
+        try:
+            # An asyncpg connection runs one query at a time
+            async with self._lock:
+                await connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+            return True
+        except Exception:
+            logger.warning("Ticket event NOTIFY failed", exc_info=True)
+            return False
+
+
+class EventBus:
+    """In-process pub/sub for ticket change events"""
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self.subscribers: Set[Subscription] = set()
+        self.bridge: Optional[PostgresNotifyBridge] = None
+
+    def subscribe(self, **filters: Optional[str]) -> Subscription:
+        """Register a subscriber receiving events whose ticket fields equal the given values"""
+        subscription = Subscription(self, filters, self.max_queue)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        """Hand an event to this worker's matching subscribers"""
+        for subscription in list(self.subscribers):
+            if subscription.matches(event):
+                subscription.put(event)
+
+    async def publish(self, event: Dict[str, Any]) -> None:
+        """Publish to every worker when bridged through Postgres, otherwise to this one"""
+        await self.publish_many([event])
+
+    async def publish_many(self, events: Iterable[Dict[str, Any]]) -> None:
+        """Publish a batch of events in as few NOTIFY round trips as the payload limit allows"""
+        if self.bridge is None:
+            for event in events:
+                self.deliver(event)
+            return
+        for payload, batch in notify_payloads(events):
+            # The NOTIFY comes back to this worker's listener too
+            if not await self.bridge.notify(payload):
+                for event in batch:
+                    self.deliver(event)
+
+    async def start(self, database_url: str) -> None:
+        """Enable cross-worker fan-out when configured and the database is Postgres"""
+        if settings.ticket_events_notify and make_url(database_url).get_backend_name() == "postgresql":
+            self.bridge = PostgresNotifyBridge(self, database_url, settings.ticket_events_channel)
+            await self.bridge.start()
+
+    async def stop(self) -> None:
+        if self.bridge is not None:
+            await self.bridge.stop()
+            self.bridge = None
+
+
+# Global instance
+event_bus = EventBus(max_queue=settings.ticket_events_queue_size)
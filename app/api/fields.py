@@ -0,0 +1,45 @@
+from functools import lru_cache
+from typing import Callable, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from app.utils.serialization import row_serializer
+
+
+class InvalidFields(ValueError):
+    """Raised when a fields= selection names fields the response does not have"""
+
+
+def parse_fields(value: Optional[str], schema: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """Turn a comma-separated fields= value into schema fields in schema order; None selects every field"""
+    if not value:
+        return None
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise InvalidFields(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(name for name in schema.model_fields if name in requested) or None
+
+
+class Projection:
+    """The columns to select for a subset of a response schema, and the serializer for the resulting rows.
+
+    Columns listed in `always` are selected after the requested ones (for
+    keyset cursors, say) but left out of the serialized output.
+    """
+
+    def __init__(self, entity, fields: Tuple[str, ...], always: Tuple[str, ...] = ()):
+        self.fields = fields
+        extra = tuple(name for name in always if name not in fields)
+        self.columns = tuple(getattr(entity, name) for name in fields + extra)
+        self.serialize: Callable = row_serializer(fields)
+
+
+@lru_cache(maxsize=256)
+def projection(entity, schema: Type[BaseModel], fields: Optional[Tuple[str, ...]], always: Tuple[str, ...] = ()) -> Projection:
+    """Shared Projection of entity onto fields of schema (every field when None)"""
+    return Projection(entity, fields or tuple(schema.model_fields), always)
+
+
+def fields_description(schema: Type[BaseModel]) -> str:
+    return "Comma-separated fields to return, out of: " + ", ".join(schema.model_fields)
@@ -0,0 +1,277 @@
+import asyncio
+import logging
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ticket import AsyncSessionLocal, OutboxEvent
+from app.utils.metrics import outbox_events_total
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Handlers registered under this key receive every event type
+ALL_EVENTS = "*"
+
+# Lease time on top of the handlers' worst case, for claiming and recording the batch
+LEASE_MARGIN_SECONDS = 30.0
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def add_outbox_events(db: AsyncSession, events: Iterable[Dict[str, Any]]) -> None:
+    """Stage ticket events in the caller's transaction so they commit or roll back with it"""
+    db.add_all([
+        OutboxEvent(event_type=event["type"], ticket_id=event["ticket"]["id"], payload=event)
+        for event in events
+    ])
+
+
+class OutboxWorker:
+    """Background task that delivers outbox events to registered handlers.
+
+    Events are claimed in batches by pushing their available_at forward
+    (a lease), so a crashed worker's events become due again and several
+    app processes can drain the same table. The lease outlasts the slowest
+    possible batch (see min_lease_seconds), so another process never reclaims
+    events that are still being delivered. Failed events are retried with
+    exponential backoff until max_attempts, after which they are marked
+    processed with last_error set.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        batch_size: int = 100,
+        concurrency: int = 10,
+        max_attempts: int = 10,
+        poll_interval: float = 1.0,
+        lease_seconds: Optional[float] = None,
+        backoff_seconds: float = 1.0,
+        backoff_max_seconds: float = 300.0,
+        handler_timeout: float = 10.0,
+        retention_hours: float = 24.0):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.handler_timeout = handler_timeout
+        self.retention_hours = retention_hours
+        self.handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self.stats = {"processed": 0, "retried": 0, "failed": 0}
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_purge = 0.0
+
+    def register(self, event_type: str, handler: Handler) -> Handler:
+        """Run handler for every event of event_type (or ALL_EVENTS)"""
+        self.handlers[event_type].append(handler)
+        return handler
+
+    def handles(self, event_type: str) -> bool:
+        """Whether any handler would run for events of event_type"""
+        return bool(self.handlers.get(event_type) or self.handlers.get(ALL_EVENTS))
+
+    def min_lease_seconds(self) -> float:
+        """Longest a claimed batch can take: concurrency events at a time, each through every handler
+        with handler_timeout, plus LEASE_MARGIN_SECONDS"""
+        shared = len(self.handlers.get(ALL_EVENTS, []))
+        per_type = max((len(handlers) for event_type, handlers in self.handlers.items() if event_type != ALL_EVENTS), default=0)
+        rounds = math.ceil(self.batch_size / self.concurrency)
+        return rounds * max(shared + per_type, 1) * self.handler_timeout + LEASE_MARGIN_SECONDS
+
+    def lease(self) -> float:
+        """Seconds a claim holds its events: lease_seconds when set, never less than min_lease_seconds"""
+        return max(self.lease_seconds or 0.0, self.min_lease_seconds())
+
+    def wake(self) -> None:
+        """Drain now instead of at the next poll; called after commits that staged events"""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def start(self) -> None:
+        if self.lease_seconds is not None and self.lease_seconds < self.min_lease_seconds():
+            raise ValueError(
+                f"OUTBOX_LEASE_SECONDS={self.lease_seconds:g} is shorter than a batch can take "
+                f"({self.min_lease_seconds():g}s for {self.batch_size} events, {self.concurrency} at a time, "
+                f"with a {self.handler_timeout:g}s handler timeout); raise it or leave it unset"
+            )
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wake = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                drained = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Outbox drain failed")
+                drained = 0
+            if drained < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+    def backoff(self, attempts: int) -> float:
+        return min(self.backoff_seconds * 2 ** max(attempts - 1, 0), self.backoff_max_seconds)
+
+    async def claim(self) -> List[OutboxEvent]:
+        """Lease a batch of due events; SKIP LOCKED keeps concurrent workers off each other's rows"""
+        now = utcnow()
+        due = (
+            select(OutboxEvent.id)
+            .where(OutboxEvent.processed_at.is_(None), OutboxEvent.available_at <= now)
+            .order_by(OutboxEvent.available_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(due.scalar_subquery()))
+            .values(
+                available_at=now + timedelta(seconds=self.lease()),
+                attempts=OutboxEvent.attempts + 1,
+            )
+            .returning(OutboxEvent)
+            .execution_options(synchronize_session=False)
+        )
+        async with self.session_factory() as db:
+            result = await db.execute(stmt)
+            events = list(result.scalars().all())
+            await db.commit()
+        return events
+
+    async def _deliver(self, event: OutboxEvent, semaphore: asyncio.Semaphore) -> Optional[str]:
+        """Run every handler for an event; the error text on failure, None on success"""
+        handlers = self.handlers.get(event.event_type, []) + self.handlers.get(ALL_EVENTS, [])
+        async with semaphore:
+            try:
+                for handler in handlers:
+                    await asyncio.wait_for(handler(event.payload), self.handler_timeout)
+            except Exception as e:
+                return f"{type(e).__name__}: {e}"[:1000]
+        return None
+
+    async def drain_once(self) -> int:
+        """Claim and deliver one batch; returns how many events were claimed"""
+        events = await self.claim()
+        if events:
+            semaphore = asyncio.Semaphore(self.concurrency)
+            errors = await asyncio.gather(*(self._deliver(event, semaphore) for event in events))
+            await self._record(events, errors)
+        await self._purge()
+        return len(events)
+
+    async def _record(self, events: List[OutboxEvent], errors: List[Optional[str]]) -> None:
+        now = utcnow()
+        delivered = [event.id for event, error in zip(events, errors) if error is None]
+        async with self.session_factory() as db:
+            if delivered:
+                await db.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id.in_(delivered))
+                    .values(processed_at=now, last_error=None)
+                    .execution_options(synchronize_session=False)
+                )
+            for event, error in zip(events, errors):
+                if error is None:
+                    continue
+                values = {"last_error": error}
+                if event.attempts >= self.max_attempts:
+                    values["processed_at"] = now
+                    self.stats["failed"] += 1
+                    outbox_events_total.labels("failed").inc()
+                    logger.error("Outbox event %s (%s) gave up after %d attempts: %s",
+                                 event.id, event.event_type, event.attempts, error)
+                else:
+                    values["available_at"] = now + timedelta(seconds=self.backoff(event.attempts))
+                    self.stats["retried"] += 1
+                    outbox_events_total.labels("retried").inc()
+                await db.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id == event.id)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+        self.stats["processed"] += len(delivered)
+        outbox_events_total.labels("processed").inc(len(delivered))
+
+    async def _purge(self) -> None:
+        """Delete delivered events past the retention window, at most once a minute"""
+        if time.monotonic() - self._last_purge < 60:
+            return
+        self._last_purge = time.monotonic()
+        cutoff = utcnow() - timedelta(hours=self.retention_hours)
+        async with self.session_factory() as db:
+            await db.execute(delete(OutboxEvent).where(OutboxEvent.processed_at < cutoff))
+            await db.commit()
+
+    def metrics(self) -> Dict[str, Any]:
+        return dict(self.stats, running=self._task is not None and not self._task.done())
+
+
+class WebhookHandler:
+    """POSTs each event as JSON to a configured URL; non-2xx responses are retried"""
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+        self._client = None
+
+    async def __call__(self, payload: Dict[str, Any]) -> None:
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        response = await self._client.post(self.url, json=payload)
+        response.raise_for_status()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Global instance
+outbox_worker = OutboxWorker(
+    batch_size=settings.outbox_batch_size,
+    concurrency=settings.outbox_concurrency,
+    max_attempts=settings.outbox_max_attempts,
+    poll_interval=settings.outbox_poll_interval_seconds,
+    lease_seconds=settings.outbox_lease_seconds,
+    backoff_seconds=settings.outbox_backoff_seconds,
+    backoff_max_seconds=settings.outbox_backoff_max_seconds,
+    handler_timeout=settings.outbox_handler_timeout_seconds,
+    retention_hours=settings.outbox_retention_hours,
+)
+
+webhook_handler: Optional[WebhookHandler] = None
+if settings.ticket_webhook_url:
+    webhook_handler = WebhookHandler(settings.ticket_webhook_url, settings.outbox_handler_timeout_seconds)
+    outbox_worker.register(ALL_EVENTS, webhook_handler)
@@ -0,0 +1,179 @@
+import asyncio
+import bisect
+import math
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, func, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer_group
+
+from app.models.ticket import Ticket
+from config import settings
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Relative weight of a match in each field, mirroring setweight A/B/C on Postgres
+FIELD_WEIGHTS = (("title", 3.0), ("description", 1.0), ("resolution_notes", 0.5))
+
+search_vector = literal_column("tickets.search_vector")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def prefix_tsquery(terms: List[str]) -> str:
+    """Postgres to_tsquery text requiring every term, each as a prefix"""
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+class InvertedIndex:
+    """In-memory ticket search index used when the database has no full-text support.
+
+    Postings map each term to the weighted term frequency per ticket, and a
+    sorted term list answers prefix lookups with bisect.
+
+    For development and single-worker deployments only: each worker builds its
+    own copy from the database on first search and then follows only its own
+    writes, so with several workers results go stale and differ between them.
+    Like the Postgres search_vector, it covers the inline text of each field,
+    which for bodies moved to the body store is their preview.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self.terms: List[str] = []
+        self.doc_terms: Dict[str, List[str]] = {}
+        self.doc_owner: Dict[str, str] = {}
+        self.built = False
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    def add(self, ticket) -> None:
+        """Index or re-index a ticket"""
+        self.remove(ticket.id)
+        weights: Dict[str, float] = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS:
+            for term in tokenize(getattr(ticket, field, None)):
+                weights[term] += weight
+        for term, weight in weights.items():
+            if term not in self.postings:
+                bisect.insort(self.terms, term)
+            self.postings[term][ticket.id] = weight
+        self.doc_terms[ticket.id] = list(weights)
+        self.doc_owner[ticket.id] = ticket.customer_id
+
+    def remove(self, ticket_id: str) -> None:
+        for term in self.doc_terms.pop(ticket_id, ()):
+            docs = self.postings[term]
+            docs.pop(ticket_id, None)
+            if not docs:
+                del self.postings[term]
+                index = bisect.bisect_left(self.terms, term)
+                if index < len(self.terms) and self.terms[index] == term:
+                    del self.terms[index]
+        self.doc_owner.pop(ticket_id, None)
+
+    def _expand(self, prefix: str) -> Iterable[str]:
+        start = bisect.bisect_left(self.terms, prefix)
+        for term in self.terms[start:]:
+            if not term.startswith(prefix):
+                break
+            yield term
+
+    def search(self, terms: List[str], customer_id: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Ids and scores of tickets matching every term as a prefix, best first"""
+        total_docs = max(len(self.doc_terms), 1)
+        scores: Optional[Dict[str, float]] = None
+        for prefix in terms:
+            term_scores: Dict[str, float] = defaultdict(float)
+            for term in self._expand(prefix):
+                docs = self.postings[term]
+                idf = math.log(1 + total_docs / len(docs))
+                for ticket_id, weight in docs.items():
+                    term_scores[ticket_id] = max(term_scores[ticket_id], weight * idf)
+            if scores is None:
+                scores = dict(term_scores)
+            else:
+                scores = {ticket_id: score + term_scores[ticket_id] for ticket_id, score in scores.items() if ticket_id in term_scores}
+            if not scores:
+                return []
+        ranked = [
+            (ticket_id, score) for ticket_id, score in (scores or {}).items()
+            if customer_id is None or self.doc_owner.get(ticket_id) == customer_id
+        ]
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked
+
+    async def ensure_built(self, db: AsyncSession, batch_size: int = 1000) -> None:
+        """Load every ticket into the index the first time it is needed"""
+        if self.built:
+            return
+        async with self._lock:
+            if self.built:
+                return
+            columns = [Ticket.id, Ticket.customer_id] + [getattr(Ticket, field) for field, _ in FIELD_WEIGHTS]
+            result = await db.stream(select(*columns).execution_options(yield_per=batch_size))
+            async for row in result:
+                self.add(row)
+            self.built = True
+
+
+class TicketSearchService:
+    def __init__(self, backend: str = "auto"):
+        self.backend = backend
+        self.index = InvertedIndex()
+
+    def _use_postgres(self, db: AsyncSession) -> bool:
+        if self.backend == "auto":
+            return db.get_bind().dialect.name == "postgresql"
+        return self.backend == "postgres"
+
+    async def search(
+        self,
+        db: AsyncSession,
+        query: str,
+        customer_id: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20) -> List[Tuple[Ticket, float]]:
+        """Rank tickets whose title, description or resolution notes match every query term"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        if self._use_postgres(db):
+            return await self._search_postgres(db, terms, customer_id, offset, limit)
+        return await self._search_index(db, terms, customer_id, offset, limit)
+
+    async def _search_postgres(self, db, terms, customer_id, offset, limit):
+        tsquery = func.to_tsquery("english", prefix_tsquery(terms))
+        rank = func.ts_rank_cd(search_vector, tsquery).label("rank")
+        stmt = select(Ticket, rank).options(undefer_group("body")).where(search_vector.op("@@")(tsquery))
+        if customer_id:
+            stmt = stmt.where(Ticket.customer_id == customer_id)
+        stmt = stmt.order_by(rank.desc(), Ticket.id).offset(offset).limit(limit)
+        result = await db.execute(stmt)
+        return [(ticket, float(score)) for ticket, score in result.all()]
+
+    async def _search_index(self, db, terms, customer_id, offset, limit):
+        await self.index.ensure_built(db)
+        page = self.index.search(terms, customer_id)[offset:offset + limit]
+        if not page:
+            return []
+        ids = [ticket_id for ticket_id, _ in page]
+        result = await db.execute(select(Ticket).filter(Ticket.id.in_(ids)).options(undefer_group("body")))
+        tickets = {ticket.id: ticket for ticket in result.scalars().all()}
+        return [(tickets[ticket_id], score) for ticket_id, score in page if ticket_id in tickets]
+
+    def index_tickets(self, tickets: Iterable[Ticket]) -> None:
+        """Keep the in-memory index current after writes; a no-op until it has been built"""
+        if self.index.built:
+            for ticket in tickets:
+                self.index.add(ticket)
+
+
+# Global instance
+search_service = TicketSearchService(backend=settings.search_backend)
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import random
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import String, cast, delete, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ticket import AsyncSessionLocal, Ticket, TicketCounter, TicketStatus
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+def dialect_name(db: AsyncSession) -> str:
+    return db.bind.dialect.name
+
+
+def created_deltas(tickets: Iterable[Ticket]) -> Counter:
+    """Counter changes, keyed by (status, agent_id or ""), for newly inserted tickets"""
+    deltas: Counter = Counter()
+    for ticket in tickets:
+        deltas[(ticket.status, ticket.agent_id or "")] += 1
+    return deltas
+
+
+def transition_deltas(changes: Iterable[Tuple[Ticket, TicketStatus, Optional[str]]]) -> Counter:
+    """Counter changes for tickets moved from (previous status, previous agent) to their current values"""
+    deltas: Counter = Counter()
+    for ticket, previous_status, previous_agent in changes:
+        before = (previous_status, previous_agent or "")
+        after = (ticket.status, ticket.agent_id or "")
+        if before != after:
+            deltas[before] -= 1
+            deltas[after] += 1
+    return deltas
+
+
+class TicketStatsService:
+    """Ticket counts per status and agent, maintained incrementally in ticket_counters"""
+
+    def __init__(self, shards: int = 8, reconcile_interval: float = 0):
+        self.shards = max(1, shards)
+        self.reconcile_interval = reconcile_interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def apply(self, db: AsyncSession, deltas: Counter) -> None:
+        """Add deltas to the counters inside the caller's transaction"""
+        shard = random.randrange(self.shards)
+        # Rows go in key order so concurrent transactions lock counters in the same order
+        rows = [
+            {"status": status, "agent_id": agent_id, "shard": shard, "count": count}
+            for (status, agent_id), count in sorted(deltas.items(), key=lambda item: (item[0][0].name, item[0][1]))
+            if count
+        ]
+        if not rows:
+            return
+        insert = sqlite.insert if dialect_name(db) == "sqlite" else postgresql.insert
+        stmt = insert(TicketCounter).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TicketCounter.status, TicketCounter.agent_id, TicketCounter.shard],
+            set_={"count": TicketCounter.count + stmt.excluded.count},
+        )
+        await db.execute(stmt)
+
+    async def get_stats(self, db: AsyncSession) -> Dict[str, Any]:
+        """Counts per status and per agent, read from the counters rather than the tickets table"""
+        result = await db.execute(
+            select(TicketCounter.status, TicketCounter.agent_id, func.sum(TicketCounter.count))
+            .group_by(TicketCounter.status, TicketCounter.agent_id)
+        )
+        by_status = {status.value: 0 for status in TicketStatus}
+        by_agent: Dict[str, Dict[str, int]] = {}
+        for status, agent_id, count in result.all():
+            if not count:
+                continue
+            by_status[status.value] += count
+            if agent_id:
+                by_agent.setdefault(agent_id, {})[status.value] = count
+        return {
+            "total": sum(by_status.values()),
+            "by_status": by_status,
+            "by_agent": by_agent,
+        }
+
+    async def reconcile(self, db: AsyncSession, repair: bool = True) -> List[Dict[str, Any]]:
+        """Compare counters with a full count of tickets; rewrite them when they drifted.
+
+        Returns the mismatched keys. On Postgres the counters are locked for the
+        duration so writers wait instead of racing the rewrite.
+        """
+        if dialect_name(db) == "postgresql":
+            await db.execute(text("LOCK TABLE ticket_counters IN EXCLUSIVE MODE"))
+        # Counters key unassigned tickets as "", which is not a valid uuid
+        agent_key = func.coalesce(cast(Ticket.agent_id, String), "")
+        actual_result = await db.execute(
+            select(Ticket.status, agent_key, func.count())
+            .group_by(Ticket.status, agent_key)
+        )
+        actual = {(status, agent_id): count for status, agent_id, count in actual_result.all()}
+        counted_result = await db.execute(
+            select(TicketCounter.status, TicketCounter.agent_id, func.sum(TicketCounter.count))
+            .group_by(TicketCounter.status, TicketCounter.agent_id)
+        )
+        counted = {(status, agent_id): count for status, agent_id, count in counted_result.all()}
+
+        mismatches = [
+            {"status": status.value, "agent_id": agent_id or None,
+             "expected": actual.get((status, agent_id), 0), "counted": counted.get((status, agent_id), 0)}
+            for status, agent_id in sorted(set(actual) | set(counted), key=lambda key: (key[0].name, key[1]))
+            if actual.get((status, agent_id), 0) != counted.get((status, agent_id), 0)
+        ]
+        if mismatches and repair:
+            logger.warning("Ticket counters drifted on %d keys; rewriting them", len(mismatches))
+            await db.execute(delete(TicketCounter))
+            if actual:
+                await db.execute(
+                    TicketCounter.__table__.insert(),
+                    [{"status": status, "agent_id": agent_id, "shard": 0, "count": count}
+                     for (status, agent_id), count in actual.items()],
+                )
+        await db.commit()
+        return mismatches
+
+    async def start(self) -> None:
+        """Reconcile periodically in the background when an interval is configured"""
+        if self.reconcile_interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.reconcile(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ticket counter reconciliation failed")
+
+
+# Global instance
+stats_service = TicketStatsService(
+    shards=settings.ticket_stats_shards,
+    reconcile_interval=settings.ticket_stats_reconcile_interval_seconds,
+)
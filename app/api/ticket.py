@@ -1,67 +1,396 @@
-from app.models.ticket import User, Ticket
+from app.models.ticket import User, Ticket, TicketStatus
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from app.schemas.ticket import TicketCreate, TicketUpdate
-from typing import List, Optional
+from sqlalchemy import select, insert, update, and_, or_, tuple_
+from sqlalchemy.orm import undefer_group
+from app.schemas.ticket import TicketCreate, TicketUpdate, TicketResponse, TicketEmbedResponse
+from app.api.pagination import decode_cursor
+from app.api.search import search_service
+from app.api.events import event_bus, ticket_event
+from app.api.outbox import add_outbox_events, outbox_worker
+from app.api.stats import created_deltas, dialect_name, stats_service, transition_deltas
+from app.api.assignment import load_balancer
+from app.api.bodies import body_service
+from app.utils.cache import CacheBackend, TTLCache, build_cache_backend
+from app.api.fields import Projection, projection
+from app.utils.serialization import dumps
+from config import settings
+from collections import defaultdict
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+# Listings select columns directly and serialize the rows without building ORM objects
+TICKET_FIELDS = tuple(TicketResponse.model_fields)
+# Keyset cursors are built from these whatever fields the caller asked for
+TICKET_CURSOR_FIELDS = ("created_at", "id")
+
+def ticket_projection(fields: Optional[Tuple[str, ...]] = None) -> Projection:
+    """Columns and row serializer for TicketResponse, or the subset of it named by fields"""
+    return projection(Ticket, TicketResponse, fields, TICKET_CURSOR_FIELDS)
+
+serialize_ticket_row = ticket_projection().serialize
+
+# Loader option for queries that build TicketResponse from Ticket objects; bodies are deferred otherwise
+WITH_BODIES = undefer_group("body")
 
 class TicketService:
+    def __init__(self, cache: Optional[CacheBackend] = None):
+        self.cache = cache or build_cache_backend(
+            settings.ticket_cache_url, settings.ticket_cache_max_size, settings.ticket_cache_ttl_seconds
+        )
+        self.embed_misses = TTLCache(max_size=settings.embed_miss_cache_size, ttl=settings.embed_miss_ttl_seconds)
+
     async def create_ticket(self, db: AsyncSession, ticket: TicketCreate, customer_id: str) -> Ticket:
         """Create a new ticket"""
-        db_ticket = Ticket(
-            **ticket.model_dump(),
-            customer_id=customer_id
-        )
-        db.add(db_ticket)
-        await db.commit()
-        await db.refresh(db_ticket)
-        return db_ticket
+        db_tickets = await self.create_tickets(db, [ticket], customer_id)
+        return db_tickets[0]
 
-    async def get_ticket_by_customer(self, db: AsyncSession, customer_id: str) -> List[Ticket]:
-        """Get tickets by customer ID"""
-        result = await db.execute(select(Ticket).filter(Ticket.customer_id == customer_id))
-        return result.scalars().all()
+    async def create_tickets(self, db: AsyncSession, tickets: List[TicketCreate], customer_id: str) -> List[Ticket]:
+        """Create many tickets with one multi-row INSERT ... RETURNING"""
+        rows = [dict(ticket.model_dump(), customer_id=customer_id) for ticket in tickets]
+        await body_service.offload(db, rows)
+        stmt = insert(Ticket).returning(Ticket, sort_by_parameter_order=True).options(WITH_BODIES)
+        result = await db.execute(stmt, rows)
+        db_tickets = result.scalars().all()
+        await stats_service.apply(db, created_deltas(db_tickets))
+        self._stage_events(db, db_tickets, "created")
+        await db.commit()
+        await self._after_write(db_tickets, "created")
+        return db_tickets
 
-    async def get_tickets(self, db: AsyncSession, status: Optional[str] = None, agent_id: Optional[str] = None) -> List[Ticket]:
-        """Get all tickets filtered by status or assigned agent"""
-        query = select(Ticket)
+    def listing_query(
+        self,
+        status: Optional[str] = None,
+        agent_id: Optional[str] = None,
+        customer_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        columns: Sequence = ()):
+        """Build the keyset-ordered ticket listing query shared by pages and exports"""
+        query = select(*columns) if columns else select(Ticket)
         if status:
             query = query.filter(Ticket.status == status)
         if agent_id:
             query = query.filter(Ticket.agent_id == agent_id)
+        if customer_id:
+            query = query.filter(Ticket.customer_id == customer_id)
+        if cursor:
+            created_at, ticket_id = decode_cursor(cursor)
+            query = query.filter(tuple_(Ticket.created_at, Ticket.id) > tuple_(created_at, ticket_id))
+        query = query.order_by(Ticket.created_at, Ticket.id)
+        if limit:
+            query = query.limit(limit)
+        return query
+
+    async def get_ticket_rows(
+        self,
+        db: AsyncSession,
+        status: Optional[str] = None,
+        agent_id: Optional[str] = None,
+        customer_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        fields: Optional[Tuple[str, ...]] = None) -> Sequence:
+        """Get a page of tickets as plain rows, for ticket_projection(fields).serialize"""
+        query = self.listing_query(
+            status=status,
+            agent_id=agent_id,
+            customer_id=customer_id,
+            cursor=cursor,
+            limit=limit,
+            columns=ticket_projection(fields).columns,
+        )
         result = await db.execute(query)
-        return result.scalars().all()
+        return result.all()
+
+    async def stream_tickets(
+        self,
+        db: AsyncSession,
+        status: Optional[str] = None,
+        agent_id: Optional[str] = None,
+        customer_id: Optional[str] = None,
+        fields: Optional[Tuple[str, ...]] = None) -> AsyncIterator:
+        """Stream every matching ticket as a row for ticket_projection(fields) through a server-side cursor"""
+        query = self.listing_query(
+            status=status, agent_id=agent_id, customer_id=customer_id, columns=ticket_projection(fields).columns
+        )
+        result = await db.stream(query.execution_options(yield_per=settings.ticket_export_batch_size))
+        async for row in result:
+            yield row
 
     async def get_ticket(self, db: AsyncSession, ticket_id: str) -> Optional[Ticket]:
         """Get ticket by ID"""
-        result = await db.execute(select(Ticket).filter(Ticket.id == ticket_id))
+        result = await db.execute(select(Ticket).filter(Ticket.id == ticket_id).options(WITH_BODIES))
         return result.scalar_one_or_none()
 
-    async def update_ticket(
+    @staticmethod
+    def _cache_key(ticket_id: str) -> str:
+        return f"ticket:{ticket_id}"
+
+    async def get_ticket_payload(
         self,
         db: AsyncSession,
         ticket_id: str,
-        ticket_update: TicketUpdate) -> Optional[Ticket]:
-        """Update ticket information"""
-        db_ticket = await self.get_ticket(db, ticket_id)
-        if not db_ticket:
+        fields: Optional[Tuple[str, ...]] = None) -> Optional[bytes]:
+        """Serialized TicketResponse JSON with full bodies, read through the response cache.
+
+        Selected fields are read uncached, and like listings carry the inline
+        preview of offloaded bodies.
+        """
+        if fields:
+            ticket_fields = ticket_projection(fields)
+            result = await db.execute(select(*ticket_fields.columns).filter(Ticket.id == ticket_id))
+            row = result.one_or_none()
+            return dumps(ticket_fields.serialize(row)) if row else None
+
+        key = self._cache_key(ticket_id)
+        payload = await self.cache.get(key)
+        if payload is None:
+            db_ticket = await self.get_ticket(db, ticket_id)
+            if db_ticket is None:
+                return None
+            response = TicketResponse.model_validate(db_ticket)
+            bodies = await body_service.load(db, db_ticket)
+            if bodies:
+                response = response.model_copy(update=bodies)
+            payload = response.model_dump_json().encode()
+            await self.cache.set(key, payload)
+        return payload
+
+    async def get_embed_payload(self, db: AsyncSession, embed_token: str) -> Optional[bytes]:
+        """Public widget projection of a ticket looked up by embed token, read through the cache"""
+        key = f"embed:{embed_token}"
+        if key in self.embed_misses:
             return None
+        payload = await self.cache.get(key)
+        if payload is None:
+            columns = [getattr(Ticket, name) for name in TicketEmbedResponse.model_fields]
+            result = await db.execute(select(*columns).filter(Ticket.embed_token == embed_token))
+            row = result.one_or_none()
+            if row is None:
+                # Remembered in a small cache of their own, so guessing neither hammers the database
+                # nor pushes real ticket payloads out of the shared cache
+                self.embed_misses.set(key, True)
+                return None
+            payload = TicketEmbedResponse.model_validate(row).model_dump_json().encode()
+            await self.cache.set(key, payload)
+        return payload
+
+    @staticmethod
+    def _stage_events(db: AsyncSession, tickets, event_type: str) -> None:
+        """Record outbox events for side effects in the same transaction as the ticket change"""
+        # With nothing to deliver them to, staging would only add an INSERT to every write
+        if outbox_worker.handles(f"ticket.{event_type}"):
+            add_outbox_events(db, (ticket_event(event_type, ticket) for ticket in tickets))
+
+    async def _after_write(self, tickets, event_type: str) -> None:
+        """Post-commit hooks for tickets that were just created, updated or assigned"""
+        tickets = list(tickets)
+        keys = [self._cache_key(ticket.id) for ticket in tickets]
+        keys += [f"embed:{ticket.embed_token}" for ticket in tickets]
+        await self.cache.delete(*keys)
+        for ticket in tickets:
+            self.embed_misses.pop(f"embed:{ticket.embed_token}")
+        search_service.index_tickets(tickets)
+        await event_bus.publish_many(ticket_event(event_type, ticket) for ticket in tickets)
+        outbox_worker.wake()
+
+    async def search_tickets(
+        self,
+        db: AsyncSession,
+        query: str,
+        customer_id: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20) -> List[Tuple[Ticket, float]]:
+        """Full-text search over title, description and resolution notes"""
+        return await search_service.search(db, query, customer_id=customer_id, offset=offset, limit=limit)
+
+    @staticmethod
+    def _event_type(values) -> str:
+        return "assigned" if "agent_id" in dict(values) else "updated"
+
+    @staticmethod
+    def _column_values(values: dict) -> dict:
+        """Convert API-level field values to what the Ticket columns expect"""
+        if values.get("status") is not None:
+            values["status"] = TicketStatus(values["status"])
+        return values
+
+    async def _update_tracked(self, db: AsyncSession, values: dict, *where) -> List[Tuple[Ticket, TicketStatus, Optional[str]]]:
+        """UPDATE ... RETURNING the changed tickets with their previous status and agent"""
+        if dialect_name(db) == "sqlite":
+            # SQLite's RETURNING cannot name joined tables, but a MATERIALIZED CTE is filled once, when the
+            # WHERE first reads it and before any row changes, so lookups into it still see the old values
+            # (RETURNING is rendered without table names, hence the distinct column labels)
+            previous = (
+                select(Ticket.id.label("previous_id"), Ticket.status.label("previous_status"), Ticket.agent_id.label("previous_agent_id"))
+                .where(*where)
+                .cte("previous")
+                .prefix_with("MATERIALIZED")
+            )
+            before = lambda column: select(column).where(previous.c.previous_id == Ticket.id).scalar_subquery()
+            result = await db.execute(
+                update(Ticket)
+                .add_cte(previous)
+                .where(Ticket.id.in_(select(previous.c.previous_id)))
+                .values(**values)
+                .returning(Ticket, before(previous.c.previous_status), before(previous.c.previous_agent_id))
+                .options(WITH_BODIES)
+                .execution_options(synchronize_session=False, populate_existing=True)
+            )
+            return [tuple(row) for row in result.all()]
+
+        # The locking CTE is evaluated once, before the update, so it still holds the old values
+        previous = select(Ticket.id, Ticket.status, Ticket.agent_id).where(*where).with_for_update().cte("previous")
+        result = await db.execute(
+            update(Ticket)
+            .add_cte(previous)
+            .where(Ticket.id == previous.c.id)
+            .values(**values)
+            .returning(Ticket, previous.c.status, previous.c.agent_id)
+            .options(WITH_BODIES)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        return [tuple(row) for row in result.all()]
 
-        for field, value in ticket_update.model_dump(exclude_unset=True).items():
-            setattr(db_ticket, field, value)
+    async def _update_returning(self, db: AsyncSession, ticket_id: str, values: dict, *predicates) -> Optional[Ticket]:
+        """Apply values to one ticket with a single UPDATE ... RETURNING and commit"""
+        if not values:
+            result = await db.execute(select(Ticket).filter(Ticket.id == ticket_id, *predicates).options(WITH_BODIES))
+            return result.scalar_one_or_none()
+
+        return await self._update_one(db, values, Ticket.id == ticket_id, *predicates)
+
+    async def _update_one(self, db: AsyncSession, values: dict, *where) -> Optional[Ticket]:
+        """Apply values to the ticket matching where, keep counters and subscribers in sync and commit"""
+        changes = await self._update_tracked(db, values, *where)
+        if not changes:
+            await db.rollback()
+            return None
+        db_ticket = changes[0][0]
+        deltas = transition_deltas(changes)
+        await stats_service.apply(db, deltas)
+        self._stage_events(db, [db_ticket], self._event_type(values))
         await db.commit()
-        await db.refresh(db_ticket)
+        load_balancer.apply(deltas)
+        await self._after_write([db_ticket], self._event_type(values))
         return db_ticket
 
+    async def update_ticket(
+        self,
+        db: AsyncSession,
+        ticket_id: str,
+        ticket_update: TicketUpdate,
+        agent_id: Optional[str] = None) -> Optional[Ticket]:
+        """Update ticket information, optionally only if it is assigned to agent_id"""
+        values = self._column_values(ticket_update.model_dump(exclude_unset=True))
+        await body_service.offload(db, [values])
+        predicates = [Ticket.agent_id == agent_id] if agent_id else []
+        return await self._update_returning(db, ticket_id, values, *predicates)
+
     async def assign_ticket(self, db: AsyncSession, ticket_id: str, agent_id: str) -> Optional[Ticket]:
         """Assign ticket to an agent"""
-        db_ticket = await self.get_ticket(db, ticket_id)
-        if not db_ticket:
-            return None
+        return await self._update_returning(db, ticket_id, {"agent_id": agent_id})
+
+    async def claim_next_ticket(self, db: AsyncSession, agent_id: str) -> Optional[Ticket]:
+        """Move the oldest open ticket that is unassigned or already the agent's to IN_PROGRESS for them.
+
+        The candidate is picked with FOR UPDATE SKIP LOCKED inside the UPDATE, so
+        concurrent claimers each take a different ticket without waiting on one
+        another. None when the queue is empty.
+        """
+        eligible = (Ticket.status == TicketStatus.OPEN, or_(Ticket.agent_id.is_(None), Ticket.agent_id == agent_id))
+        oldest = (
+            select(Ticket.id)
+            .where(*eligible)
+            .order_by(Ticket.created_at, Ticket.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        # eligible is re-checked on the locked row in case it was claimed since the snapshot
+        return await self._update_one(
+            db,
+            {"agent_id": agent_id, "status": TicketStatus.IN_PROGRESS},
+            Ticket.id.in_(oldest.scalar_subquery()),
+            *eligible,
+        )
+
+    async def auto_assign_ticket(self, db: AsyncSession, ticket_id: str) -> Optional[Ticket]:
+        """Assign an unassigned open ticket to the least-loaded agent; None if missing, assigned or not open"""
+        await load_balancer.ensure_loaded(db)
+        agent_id = load_balancer.reserve()
+        try:
+            # The agent_id IS NULL guard makes concurrent auto-assigners of one ticket race safely
+            return await self._update_returning(
+                db, ticket_id, {"agent_id": agent_id}, Ticket.agent_id.is_(None), Ticket.status == TicketStatus.OPEN
+            )
+        finally:
+            load_balancer.release(agent_id)
 
-        db_ticket.agent_id = agent_id
+    async def auto_assign_queue(self, db: AsyncSession, limit: int) -> List[Ticket]:
+        """Assign the oldest unassigned open tickets to the least-loaded agents.
+
+        Rows are claimed with FOR UPDATE SKIP LOCKED, so concurrent callers split
+        the queue between them instead of waiting on or double-assigning tickets.
+        """
+        await load_balancer.ensure_loaded(db)
+        result = await db.execute(
+            select(Ticket.id)
+            .where(Ticket.agent_id.is_(None), Ticket.status == TicketStatus.OPEN)
+            .order_by(Ticket.created_at, Ticket.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        ticket_ids = result.scalars().all()
+        if not ticket_ids:
+            await db.rollback()
+            return []
+        reserved = []
+        try:
+            for ticket_id in ticket_ids:
+                reserved.append(load_balancer.reserve())
+            # Without SKIP LOCKED (SQLite) two callers can select the same rows; the guard keeps the first
+            updated = await self.bulk_update_tickets(
+                db,
+                {ticket_id: {"agent_id": agent_id} for ticket_id, agent_id in zip(ticket_ids, reserved)},
+                Ticket.agent_id.is_(None),
+            )
+        finally:
+            load_balancer.release(*reserved)
+        return [updated[ticket_id] for ticket_id in ticket_ids if ticket_id in updated]
+
+    async def bulk_update_tickets(self, db: AsyncSession, changes: Dict[str, dict], *predicates) -> Dict[str, Ticket]:
+        """Apply per-ticket changes with one set-based UPDATE per distinct change, in one transaction.
+
+        Returns the updated tickets keyed by id; ids missing from the result were not
+        found or did not match the extra predicates.
+        """
+        groups: Dict[Tuple, List[str]] = defaultdict(list)
+        for ticket_id, values in changes.items():
+            values = self._column_values(dict(values))
+            groups[tuple(sorted(values.items(), key=lambda item: item[0]))].append(ticket_id)
+
+        updated: Dict[str, Ticket] = {}
+        events: Dict[str, List[Ticket]] = defaultdict(list)
+        changes = []
+        for values, ticket_ids in groups.items():
+            if not values:
+                result = await db.execute(select(Ticket).filter(Ticket.id.in_(ticket_ids)).options(WITH_BODIES))
+                for db_ticket in result.scalars().all():
+                    updated[db_ticket.id] = db_ticket
+                continue
+            group_changes = await self._update_tracked(db, dict(values), Ticket.id.in_(ticket_ids), *predicates)
+            for db_ticket, _, _ in group_changes:
+                updated[db_ticket.id] = db_ticket
+                events[self._event_type(values)].append(db_ticket)
+            changes.extend(group_changes)
+        deltas = transition_deltas(changes)
+        await stats_service.apply(db, deltas)
+        for event_type, db_tickets in events.items():
+            self._stage_events(db, db_tickets, event_type)
         await db.commit()
-        await db.refresh(db_ticket)
-        return db_ticket
+        load_balancer.apply(deltas)
+        for event_type, db_tickets in events.items():
+            await self._after_write(db_tickets, event_type)
+        return updated
 
 
 ticket_service = TicketService()
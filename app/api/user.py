@@ -1,9 +1,15 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models.ticket import User
-from app.schemas.ticket import UserCreate, UserUpdate
+from app.schemas.ticket import UserCreate, UserUpdate, UserResponse
 from app.security.auth import auth_service
-from typing import Optional, List
+from app.api.fields import Projection, projection
+from typing import Optional, List, Sequence, Tuple
+
+
+def user_projection(fields: Optional[Tuple[str, ...]] = None) -> Projection:
+    """Columns and row serializer for UserResponse, or the subset of it named by fields"""
+    return projection(User, UserResponse, fields)
 
 
 class UserService:
@@ -12,7 +18,7 @@ class UserService:
 
     async def create_user(self, db: AsyncSession, user: UserCreate) -> User:
         """Create a new user"""
-        hashed_password = self.auth_service.get_password_hash(user.password)
+        hashed_password = await self.auth_service.get_password_hash(user.password)
         db_user = User(
             first_name=user.first_name,
             last_name=user.last_name,
@@ -35,22 +41,40 @@ class UserService:
         result = await db.execute(select(User).offset(skip).limit(limit))
         return result.scalars().all()
 
+    async def get_user_rows(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[Tuple[str, ...]] = None) -> Sequence:
+        """Get a page of users as plain rows, for user_projection(fields).serialize"""
+        columns = user_projection(fields).columns
+        result = await db.execute(select(*columns).order_by(User.created_at, User.id).offset(skip).limit(limit))
+        return result.all()
+
+    async def get_user_row(self, db: AsyncSession, user_id: str, fields: Optional[Tuple[str, ...]] = None):
+        """Get one user as a plain row, for user_projection(fields).serialize"""
+        result = await db.execute(select(*user_projection(fields).columns).filter(User.id == user_id))
+        return result.one_or_none()
+
     async def update_user(self, db: AsyncSession, user_id: str, user_update: UserUpdate) -> Optional[User]:
         """Update user information"""
         db_user = await self.get_user(db, user_id)
         if not db_user:
             return None
 
+        previous_email = db_user.email
         update_data = user_update.model_dump(exclude_unset=True)
 
         # Handle password update separately
         if "password" in update_data:
-            update_data["hashed_password"] = self.auth_service.get_password_hash(update_data.pop("password"))
+            update_data["hashed_password"] = await self.auth_service.get_password_hash(update_data.pop("password"))
 
         for field, value in update_data.items():
             setattr(db_user, field, value)
 
         await db.commit()
+        self.auth_service.invalidate_principal(previous_email, db_user.email)
         await db.refresh(db_user)
         return db_user
 
@@ -62,6 +86,7 @@ class UserService:
 
         await db.delete(db_user)
         await db.commit()
+        self.auth_service.invalidate_principal(db_user.email)
         return True
 
     async def is_email_taken(self, db: AsyncSession, email: str) -> bool:
@@ -1,14 +1,83 @@
-from fastapi import Depends, HTTPException, status
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncContextManager, Callable, Optional, Tuple, Type
+
+from fastapi import Depends, HTTPException, Query, WebSocket, status
 from fastapi.security import OAuth2PasswordBearer
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import HTTPConnection
 
-from app.models.ticket import get_db, User
+from app.api.fields import InvalidFields, fields_description, parse_fields
+from app.models.replicas import Replica, is_connection_error, replica_router
+from app.models.ticket import AsyncSessionLocal, User
 from app.security.auth import auth_service
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
+async def get_db():
+    async with AsyncSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+@contextmanager
+def replica_failures(replica: Replica):
+    """Take replica out of rotation when the block fails to reach it"""
+    try:
+        yield
+    except Exception as e:
+        if is_connection_error(e):
+            replica_router.mark_failed(replica, e)
+        raise
+
+
+def read_sessions(connection: HTTPConnection) -> Callable[[], AsyncContextManager[AsyncSession]]:
+    """Session factory for reads that outlive the request, such as streamed responses.
+
+    Sessions are on a replica when one is usable and mark it failed on connection
+    errors, like get_read_db. A replica that cannot be reached when the session
+    opens is swapped for the primary, since nothing has been read from it yet.
+    """
+    replica = replica_router.pick(connection)
+    if replica is None:
+        return AsyncSessionLocal
+
+    @asynccontextmanager
+    async def sessions():
+        async with replica.sessions() as session:
+            try:
+                # Connect before handing the session out, while falling back is still possible
+                with replica_failures(replica):
+                    await session.connection()
+            except Exception as e:
+                if not is_connection_error(e):
+                    raise
+            else:
+                with replica_failures(replica):
+                    yield session
+                return
+        async with AsyncSessionLocal() as session:
+            yield session
+
+    return sessions
+
+
+async def get_read_db(connection: HTTPConnection, db: AsyncSession = Depends(get_db)):
+    """Session for read-only endpoints: on a read replica when one is usable, otherwise on the primary"""
+    replica = replica_router.pick(connection)
+    if replica is None:
+        # The request's primary session, shared with get_current_user so a request holds one connection
+        yield db
+        return
+    async with replica.sessions() as session:
+        with replica_failures(replica):
+            yield session
+
+
 async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     """Get current authenticated user"""
     credentials_exception = HTTPException(
@@ -21,7 +90,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
     if token_data is None:
         raise credentials_exception
 
-    user = await auth_service.get_user_by_email(db, email=token_data.email)
+    user = await auth_service.get_principal(db, email=token_data.email)
     if user is None:
         raise credentials_exception
 
@@ -45,3 +114,28 @@ def require_role(required_role: list):
             )
         return current_user
     return role_checker
+
+
+def select_fields(schema: Type[BaseModel]):
+    async def fields_parser(
+        fields: Optional[str] = Query(None, description=fields_description(schema))
+    ) -> Optional[Tuple[str, ...]]:
+        """Fields of schema requested with fields=, or None for all of them"""
+        try:
+            return parse_fields(fields, schema)
+        except InvalidFields as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return fields_parser
+
+
+async def get_websocket_user(websocket: WebSocket, db: AsyncSession) -> Optional[User]:
+    """Active user for a WebSocket, from a bearer header or ?token= (browsers cannot set headers)"""
+    authorization = websocket.headers.get("authorization", "")
+    token = authorization[7:] if authorization.lower().startswith("bearer ") else websocket.query_params.get("token")
+    token_data = auth_service.verify_token(token) if token else None
+    if token_data is None:
+        return None
+    user = await auth_service.get_principal(db, email=token_data.email)
+    if user is None or not user.is_activated:
+        return None
+    return user
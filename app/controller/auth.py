@@ -3,9 +3,10 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
-from app.models.ticket import get_db
+from app.config.dependencies import get_db
 from app.schemas.ticket import UserCreate, UserResponse, UserToken, UserLogin
 from app.security.auth import auth_service
+from app.security.hashing import HashingPoolSaturated
 from app.api.user import user_service
 from config import settings
 from datetime import datetime
@@ -14,6 +15,14 @@ from datetime import datetime
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
+def _too_many_requests() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Authentication service is busy, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register")
 async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user"""
@@ -33,6 +42,8 @@ async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
             "message": "User created successfully",
             "user": user_response.model_dump()
         }
+    except HashingPoolSaturated:
+        raise _too_many_requests()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -46,7 +57,10 @@ async def login_for_access_token(payload: UserLogin, db: AsyncSession = Depends(
     email = payload.email
     password = payload.password
 
-    user = await auth_service.authenticate_user(db, email, password)
+    try:
+        user = await auth_service.authenticate_user(db, email, password)
+    except HashingPoolSaturated:
+        raise _too_many_requests()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -57,6 +71,7 @@ async def login_for_access_token(payload: UserLogin, db: AsyncSession = Depends(
     # Update last login time
     user.last_login = datetime.now()
     await db.commit()
+    auth_service.invalidate_principal(user.email)
     await db.refresh(user)
 
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
@@ -0,0 +1,54 @@
+import math
+from fastapi import APIRouter, Depends, HTTPException, Path, Header, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.config.dependencies import get_db
+from app.schemas.ticket import TicketEmbedResponse
+from app.api.ticket import ticket_service
+from app.controller.tickets import etag_matches
+from app.utils.cache import payload_etag
+from app.utils.rate_limit import RateLimiter
+from config import settings
+
+router = APIRouter(prefix="/embed", tags=["Embed"])
+
+embed_rate_limiter = RateLimiter(
+    rate=settings.embed_rate_limit_per_minute / 60,
+    burst=settings.embed_rate_limit_burst,
+)
+
+
+@router.get("/{embed_token}", response_model=TicketEmbedResponse, status_code=status.HTTP_200_OK)
+async def get_embedded_ticket(
+    embed_token: str = Path(..., max_length=64, description="Ticket embed token"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Public ticket status widget; no authentication, the embed token is the credential"""
+    retry_after = embed_rate_limiter.acquire(embed_token)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests for this ticket",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+    payload = await ticket_service.get_embed_payload(db, embed_token)
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ticket not found"
+        )
+
+    etag = payload_etag(payload)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={settings.embed_max_age_seconds}, "
+            f"stale-while-revalidate={settings.embed_max_age_seconds * 5}"
+        ),
+        "Access-Control-Allow-Origin": "*",
+    }
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
@@ -1,4 +1,11 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
+
+from app.api.outbox import outbox_worker
+from app.api.ticket import ticket_service
+from app.models.replicas import replica_router
+from app.models.ticket import pool_status
+from app.security.hashing import password_hasher
+from app.utils.metrics import render_latest
 
 
 router = APIRouter(tags=["Public"])
@@ -8,3 +15,23 @@ router = APIRouter(tags=["Public"])
 async def root():
     """Welcome endpoint"""
     return {"message": "FastAPI Ticket Management API", "version": "1.0.0"}
+
+
+@router.get("/health")
+async def health():
+    """Runtime pool metrics for capacity planning"""
+    return {
+        "status": "ok",
+        "db_pool": pool_status(),
+        "db_replicas": replica_router.metrics(),
+        "password_hashing": password_hasher.metrics(),
+        "ticket_cache": ticket_service.cache.metrics(),
+        "outbox": outbox_worker.metrics(),
+    }
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus exposition of request, pool, hashing and JWT metrics"""
+    payload, content_type = render_latest()
+    return Response(content=payload, media_type=content_type)
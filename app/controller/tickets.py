@@ -1,14 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Header, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
-from app.models.ticket import get_db, User
-from app.schemas.ticket import TicketCreate, TicketUpdate, TicketResponse, TicketAssign
-from app.api.ticket import ticket_service
-from app.config.dependencies import get_current_active_user, require_role
+from typing import List, Optional, Tuple
+from app.models.ticket import User, AsyncSessionLocal
+from app.schemas.ticket import (
+    TicketStatus,
+    TicketCreate, TicketUpdate, TicketResponse, TicketAssign,
+    TicketBulkCreate, TicketBulkUpdate, TicketBulkUpdateItem, BulkItemResult,
+)
+from app.api.ticket import ticket_projection, ticket_service
+from app.api.events import event_bus
+from app.api.stats import stats_service
+from app.api.assignment import NoAgentsAvailable
+from app.api.pagination import InvalidCursor, next_cursor
+from app.config.dependencies import get_current_active_user, get_db, get_read_db, get_websocket_user, read_sessions, require_role, select_fields
+from app.utils.cache import payload_etag
+from app.utils.serialization import FastJSONResponse, dumps
+from config import settings
 from typing import Any
 
 router = APIRouter(prefix="/tickets", tags=["Tickets"])
 
+page_size_query = Query(settings.ticket_page_size, ge=1, le=settings.ticket_page_size_max, description="Tickets per page")
+cursor_query = Query(None, description="Opaque cursor returned as next_cursor by the previous page")
+ticket_fields = select_fields(TicketResponse)
+
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors())
+
+
+def invalid_cursor_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid pagination cursor"
+    )
+
+
+def no_agents_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="No active agents available for assignment"
+    )
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header covers the current ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
 @router.post("/", response_model=TicketResponse, status_code=status.HTTP_201_CREATED)
 async def create_ticket(
     ticket: TicketCreate,
@@ -25,81 +70,366 @@ async def create_ticket(
             detail="Failed to create ticket"
         )
 
+@router.post("/bulk", response_model=None, status_code=status.HTTP_200_OK)
+async def bulk_create_tickets(
+    payload: TicketBulkCreate,
+    current_user: Any = Depends(require_role(["customer"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create many tickets in one transaction, reporting success per item"""
+    results: List[BulkItemResult] = []
+    valid: List[tuple] = []
+    for index, item in enumerate(payload.tickets):
+        try:
+            valid.append((index, TicketCreate.model_validate(item)))
+        except ValidationError as e:
+            results.append(BulkItemResult(index=index, success=False, error=validation_message(e)))
+
+    if valid:
+        try:
+            db_tickets = await ticket_service.create_tickets(db, [ticket for _, ticket in valid], current_user.id)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to create tickets"
+            )
+        for (index, _), db_ticket in zip(valid, db_tickets):
+            results.append(BulkItemResult(index=index, success=True, id=db_ticket.id))
+
+    results.sort(key=lambda result: result.index)
+    created = sum(result.success for result in results)
+    return {
+        "status": "success",
+        "status_code": status.HTTP_200_OK,
+        "message": f"{created} of {len(results)} tickets created",
+        "results": results
+    }
+
+@router.patch("/bulk", response_model=None, status_code=status.HTTP_200_OK)
+async def bulk_update_tickets(
+    payload: TicketBulkUpdate,
+    current_user: Any = Depends(require_role(["agent", "admin"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Change status and/or assignment of many tickets in one transaction, reporting success per item"""
+    errors = {}
+    changes = {}
+    indexes = {}
+    for index, item in enumerate(payload.items):
+        try:
+            change = TicketBulkUpdateItem.model_validate(item)
+        except ValidationError as e:
+            errors[index] = validation_message(e)
+            continue
+        values = change.model_dump(exclude_unset=True, exclude={"id"})
+        if "agent_id" in values and current_user.role != "admin":
+            errors[index] = "Only admins can assign tickets"
+        elif not values:
+            errors[index] = "Nothing to update"
+        elif change.id in changes:
+            errors[index] = "Duplicate ticket id in batch"
+        else:
+            changes[change.id] = values
+            indexes[index] = change.id
+
+    updated = await ticket_service.bulk_update_tickets(db, changes) if changes else {}
+
+    results = []
+    for index in range(len(payload.items)):
+        if index in errors:
+            results.append(BulkItemResult(index=index, success=False, error=errors[index]))
+        elif indexes[index] in updated:
+            results.append(BulkItemResult(index=index, success=True, id=indexes[index]))
+        else:
+            results.append(BulkItemResult(index=index, success=False, id=indexes[index], error="Ticket not found"))
+
+    succeeded = sum(result.success for result in results)
+    return {
+        "status": "success",
+        "status_code": status.HTTP_200_OK,
+        "message": f"{succeeded} of {len(results)} tickets updated",
+        "results": results
+    }
+
+@router.post("/auto-assign", response_model=None, status_code=status.HTTP_200_OK)
+async def auto_assign_tickets(
+    limit: int = Query(20, ge=1, le=settings.auto_assign_batch_max, description="Maximum tickets to assign"),
+    current_user: Any = Depends(require_role(["admin"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Assign the oldest unassigned open tickets to the least-loaded agents"""
+    try:
+        assigned = await ticket_service.auto_assign_queue(db, limit)
+    except NoAgentsAvailable:
+        raise no_agents_exception()
+    return {
+        "status": "success",
+        "status_code": status.HTTP_200_OK,
+        "message": f"{len(assigned)} tickets assigned",
+        "tickets": [TicketResponse.model_validate(ticket) for ticket in assigned]
+    }
+
+@router.post("/claim", response_model=None, status_code=status.HTTP_200_OK)
+async def claim_ticket(
+    current_user: Any = Depends(require_role(["agent"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Claim the oldest open ticket for the current agent and mark it in progress"""
+    claimed_ticket = await ticket_service.claim_next_ticket(db, current_user.id)
+    if not claimed_ticket:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No open tickets to claim"
+        )
+    return {
+        "status": "success",
+        "status_code": status.HTTP_200_OK,
+        "message": "Ticket claimed successfully",
+        "ticket": TicketResponse.model_validate(claimed_ticket)
+    }
+
 @router.get("/my", response_model=None, status_code=status.HTTP_200_OK)
 async def get_my_tickets(
+    cursor: Optional[str] = cursor_query,
+    limit: int = page_size_query,
+    fields: Optional[Tuple[str, ...]] = Depends(ticket_fields),
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get tickets for the current user"""
-    tickets = await ticket_service.get_ticket_by_customer(db, current_user.id)
-    if not tickets:
+    """Get a page of tickets for the current user"""
+    try:
+        rows = await ticket_service.get_ticket_rows(
+            db, customer_id=current_user.id, cursor=cursor, limit=limit, fields=fields
+        )
+    except InvalidCursor:
+        raise invalid_cursor_exception()
+    if not rows and cursor is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No tickets found for this user"
         )
-    return {
+    serialize = ticket_projection(fields).serialize
+    return FastJSONResponse({
         "status": "success",
         "status_code": status.HTTP_200_OK,
         "message": "Tickets retrieved successfully",
-        "tickets": [ticket for ticket in tickets]
-    }
+        "tickets": [serialize(row) for row in rows],
+        "next_cursor": next_cursor(rows, limit)
+    })
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_tickets(
+    ticket_status: Optional[str] = Query(None, description="Filter tickets by status"),
+    fields: Optional[Tuple[str, ...]] = Depends(ticket_fields),
+    current_user: Any = Depends(require_role(["agent", "admin", "customer"])),
+    sessions=Depends(read_sessions)
+):
+    """Stream matching tickets as newline-delimited JSON"""
+    filters = {"status": ticket_status, "fields": fields}
+    if current_user.role == "customer":
+        filters["customer_id"] = current_user.id
+    else:
+        filters["agent_id"] = current_user.id
+
+    serialize = ticket_projection(fields).serialize
+
+    async def ndjson_lines():
+        # The request-scoped session is closed before the body streams, so use a dedicated one
+        async with sessions() as session:
+            async for row in ticket_service.stream_tickets(session, **filters):
+                yield dumps(serialize(row)) + b"\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
 
 @router.get("/", response_model=None, status_code=status.HTTP_200_OK)
 async def get_tickets(
     ticket_id: str,
     ticket_status: Optional[str] = Query(None, description="Filter tickets by status or assigned agent"),
+    cursor: Optional[str] = cursor_query,
+    limit: int = page_size_query,
+    fields: Optional[Tuple[str, ...]] = Depends(ticket_fields),
     current_user: Any = Depends(require_role(["agent", "admin"])),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ) -> List[TicketResponse]:
-    """Get all tickets filtered by status or assigned agent"""
+    """Get a page of tickets filtered by status or assigned agent"""
     if not ticket_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Ticket ID is required"
         )
 
-    tickets = await ticket_service.get_tickets(db, status=ticket_status, agent_id=current_user.id)
-    if not tickets:
+    try:
+        rows = await ticket_service.get_ticket_rows(
+            db, status=ticket_status, agent_id=current_user.id, cursor=cursor, limit=limit, fields=fields
+        )
+    except InvalidCursor:
+        raise invalid_cursor_exception()
+    if not rows and cursor is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No tickets found"
         )
 
+    serialize = ticket_projection(fields).serialize
+    return FastJSONResponse({
+        "status": "success",
+        "status_code": status.HTTP_200_OK,
+        "message": "Tickets retrieved successfully",
+        "tickets": [serialize(row) for row in rows],
+        "next_cursor": next_cursor(rows, limit)
+    })
+
+def event_filters(user: Any, status_filter: Optional[TicketStatus], agent_id: Optional[str], customer_id: Optional[str]) -> dict:
+    """Subscription filters for a user; customers only ever see their own tickets"""
+    if user.role == "customer":
+        customer_id = user.id
+    return {
+        "status": status_filter.value if status_filter else None,
+        "agent_id": agent_id,
+        "customer_id": customer_id,
+    }
+
+
+@router.get("/events", response_model=None, status_code=status.HTTP_200_OK)
+async def stream_ticket_events(
+    status_filter: Optional[TicketStatus] = Query(None, alias="status"),
+    agent_id: Optional[str] = Query(None),
+    customer_id: Optional[str] = Query(None),
+    current_user: Any = Depends(require_role(["agent", "admin", "customer"]))
+):
+    """Server-Sent Events stream of ticket created/updated/assigned events"""
+    filters = event_filters(current_user, status_filter, agent_id, customer_id)
+
+    async def events():
+        with event_bus.subscribe(**filters) as subscription:
+            yield ": connected\n\n"
+            while True:
+                event = await subscription.get(timeout=settings.ticket_events_heartbeat_seconds)
+                if event is None:
+                    # Comment lines keep proxies from timing out an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event['ticket'])}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/events/ws")
+async def ticket_events_websocket(
+    websocket: WebSocket,
+    status_filter: Optional[TicketStatus] = Query(None, alias="status"),
+    agent_id: Optional[str] = Query(None),
+    customer_id: Optional[str] = Query(None)
+):
+    """WebSocket stream of ticket created/updated/assigned events"""
+    async with AsyncSessionLocal() as db:
+        current_user = await get_websocket_user(websocket, db)
+    if current_user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    with event_bus.subscribe(**event_filters(current_user, status_filter, agent_id, customer_id)) as subscription:
+        async def forward():
+            while True:
+                await websocket.send_json(await subscription.get())
+
+        sender = asyncio.create_task(forward())
+        try:
+            # Client messages are ignored; receiving is how a disconnect is noticed
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+
+@router.get("/stats", response_model=None, status_code=status.HTTP_200_OK)
+async def get_ticket_stats(
+    current_user: Any = Depends(require_role(["admin"])),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Ticket counts per status and per agent, served from precomputed counters"""
+    stats = await stats_service.get_stats(db)
+    return {
+        "status": "success",
+        "status_code": status.HTTP_200_OK,
+        "message": "Ticket statistics retrieved successfully",
+        **stats
+    }
+
+@router.post("/stats/reconcile", response_model=None, status_code=status.HTTP_200_OK)
+async def reconcile_ticket_stats(
+    repair: bool = Query(True, description="Rewrite the counters when they disagree with the tickets table"),
+    current_user: Any = Depends(require_role(["admin"])),
+    db: AsyncSession = Depends(get_db)
+):
+    """Verify the counters against a full count of tickets"""
+    mismatches = await stats_service.reconcile(db, repair=repair)
+    return {
+        "status": "success",
+        "status_code": status.HTTP_200_OK,
+        "message": "Counters repaired" if mismatches and repair else "Counters checked",
+        "mismatches": mismatches
+    }
+
+@router.get("/search", response_model=None, status_code=status.HTTP_200_OK)
+async def search_tickets(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to match; each also matches as a prefix"),
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=settings.search_page_size_max),
+    current_user: Any = Depends(require_role(["agent", "admin", "customer"])),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Search ticket titles, descriptions and resolution notes, best matches first"""
+    customer_id = current_user.id if current_user.role == "customer" else None
+    matches = await ticket_service.search_tickets(
+        db, q, customer_id=customer_id, offset=(page - 1) * limit, limit=limit
+    )
     return {
         "status": "success",
         "status_code": status.HTTP_200_OK,
         "message": "Tickets retrieved successfully",
-        "tickets": [ticket for ticket in tickets]
+        "tickets": [
+            dict(TicketResponse.model_validate(ticket).model_dump(), rank=round(rank, 6))
+            for ticket, rank in matches
+        ],
+        "next_page": page + 1 if len(matches) == limit else None
     }
 
 @router.get("/{id}", response_model=TicketResponse, status_code=status.HTTP_200_OK)
 async def get_ticket(
     db: AsyncSession = Depends(get_db),
     current_user: Any = Depends(require_role(["agent", "admin", "customer"])),
-    id: str = Path(..., description="Ticket ID to view")
+    id: str = Path(..., description="Ticket ID to view"),
+    fields: Optional[Tuple[str, ...]] = Depends(ticket_fields),
+    if_none_match: Optional[str] = Header(None)
 ):
     """View specific ticket with access control"""
-    db_ticket = await ticket_service.get_ticket(db, id)
-    if not db_ticket:
+    # Served from the response cache when warm, so a revalidation can answer 304 without a query
+    payload = await ticket_service.get_ticket_payload(db, id, fields=fields)
+    if not payload:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Ticket not found"
         )
 
     """Check if current user role has permission to view the ticket"""
-    if current_user.role not in ["admin", "agent", "customer"] and db_ticket.customer_id != current_user.id:
+    if current_user.role not in ["admin", "agent", "customer"] and json.loads(payload).get("customer_id") != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to view this ticket"
         )
-    return db_ticket
-    
-    # return {
-    #     "status": "success",
-    #     "status_code": status.HTTP_200_OK,
-    #     "message": "Ticket retrieved successfully",
-    #     "ticket": db_ticket.model_dump()
-    # }
+
+    etag = payload_etag(payload)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
 
 @router.patch("/{id}", response_model=None, status_code=status.HTTP_200_OK)
 async def update_ticket(
@@ -109,23 +439,19 @@ async def update_ticket(
     db: AsyncSession = Depends(get_db)
 ):
     """Update ticket information"""
-    db_ticket = await ticket_service.get_ticket(db, id)
-    if not db_ticket or (current_user.role not in ["admin", "agent"] and db_ticket.agent_id != current_user.id):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Ticket not found or you do not have permission to update this ticket"
-        )
-    updated_ticket = await ticket_service.update_ticket(db, id, ticket_update)
+    # Agents and admins may update any ticket; anyone else only tickets assigned to them
+    assignee = None if current_user.role in ["admin", "agent"] else current_user.id
+    updated_ticket = await ticket_service.update_ticket(db, id, ticket_update, agent_id=assignee)
     if not updated_ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Ticket not found"
+            detail="Ticket not found or you do not have permission to update this ticket"
         )
     return {
         "status": "success",
         "status_code": status.HTTP_200_OK,
         "message": "Ticket updated successfully",
-        "ticket": updated_ticket
+        "ticket": TicketResponse.model_validate(updated_ticket)
     }
 
 @router.patch("/{id}/assign", response_model=None, status_code=status.HTTP_200_OK)
@@ -135,15 +461,19 @@ async def assign_ticket(
     current_user: Any = Depends(require_role(["admin"])),
     db: AsyncSession = Depends(get_db)
 ):
-    """Assign ticket to an agent"""
-    db_ticket = await ticket_service.get_ticket(db, id)
-    if not db_ticket or current_user.role not in ["admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Ticket not found or you do not have permission to assign this ticket"
-        )
-    
-    assigned_ticket = await ticket_service.assign_ticket(db, id, ticket_assign.agent_id)
+    """Assign ticket to an agent, or with auto=true to the least-loaded agent"""
+    if not ticket_assign.auto:
+        assigned_ticket = await ticket_service.assign_ticket(db, id, ticket_assign.agent_id)
+    else:
+        try:
+            assigned_ticket = await ticket_service.auto_assign_ticket(db, id)
+        except NoAgentsAvailable:
+            raise no_agents_exception()
+        if not assigned_ticket and await ticket_service.get_ticket(db, id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Ticket is already assigned or not open"
+            )
     if not assigned_ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -154,5 +484,5 @@ async def assign_ticket(
         "status": "success",
         "status_code": status.HTTP_200_OK,
         "message": "Ticket assigned successfully",
-        "ticket": assigned_ticket
+        "ticket": TicketResponse.model_validate(assigned_ticket)
     }
\ No newline at end of file
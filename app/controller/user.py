@@ -1,14 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional, Tuple
 
-from app.models.ticket import get_db, User
+from app.models.ticket import User
 from app.schemas.ticket import UserResponse, UserUpdate
-from app.api.user import user_service
-from app.config.dependencies import get_current_active_user
+from app.api.user import user_projection, user_service
+from app.config.dependencies import get_current_active_user, get_db, get_read_db, select_fields
+from app.security.hashing import HashingPoolSaturated
+from app.utils.serialization import FastJSONResponse
 
 
 router = APIRouter(prefix="/users", tags=["Users"])
+user_fields = select_fields(UserResponse)
 
 
 @router.get("/me")
@@ -37,7 +40,15 @@ async def update_user_profile(
     db: AsyncSession = Depends(get_db)
 ):
     """Update current user profile"""
-    updated_user = await user_service.update_user(db, current_user.id, user_update)
+    try:
+        updated_user = await user_service.update_user(db, current_user.id, user_update)
+    except HashingPoolSaturated:
+        # A new password is hashed on the same bounded pool as login and register
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Authentication service is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
     if not updated_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -55,35 +66,38 @@ async def update_user_profile(
 async def read_users(
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[Tuple[str, ...]] = Depends(user_fields),
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get list of users (protected endpoint)"""
-    users = await user_service.get_users(db, skip=skip, limit=limit)
-    return {
+    rows = await user_service.get_user_rows(db, skip=skip, limit=limit, fields=fields)
+    serialize = user_projection(fields).serialize
+    return FastJSONResponse({
         "status": "success",
         "status_code": status.HTTP_200_OK,
         "message": "Users retrieved successfully",
-        "users": [user.model_dump(exclude={"hashed_password"}) for user in users]
-    }
+        "users": [serialize(row) for row in rows]
+    })
 
 
 @router.get("/{user_id}")
 async def read_user(
-    user_id: int,
+    user_id: str,
+    fields: Optional[Tuple[str, ...]] = Depends(user_fields),
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get user by ID (protected endpoint)"""
-    user = await user_service.get_user(db, user_id=user_id)
-    if user is None:
+    row = await user_service.get_user_row(db, user_id, fields=fields)
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    return {
+    return FastJSONResponse({
         "status": "success",
         "status_code": status.HTTP_200_OK,
         "message": "User retrieved successfully",
-        "user": user.model_dump(exclude={"hashed_password"})
-    }
+        "user": user_projection(fields).serialize(row)
+    })
@@ -0,0 +1,60 @@
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.models.query_stats import QueryStats, current_query_stats
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    """Report per-request SQL statement counts and DB time.
+
+    Adds Server-Timing and X-DB-Query-Count headers covering the statements
+    run before the response starts, and logs requests whose total DB time
+    crosses settings.slow_request_db_ms.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_stats(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.query_stats_headers:
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing())
+                headers.append("X-DB-Query-Count", str(stats.count))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            current_query_stats.reset(token)
+            if stats.total_seconds * 1000 >= settings.slow_request_db_ms:
+                logger.warning(
+                    "%s %s spent %.1fms in %d queries",
+                    scope["method"],
+                    scope["path"],
+                    stats.total_seconds * 1000,
+                    stats.count,
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "db_queries": stats.count,
+                        "db_ms": round(stats.total_seconds * 1000, 2),
+                        "db_slowest_ms": round(stats.slowest_seconds * 1000, 2),
+                        "db_slowest_statement": stats.slowest_statement,
+                        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    },
+                )
@@ -0,0 +1,40 @@
+import math
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.models.replicas import PIN_COOKIE, PIN_HEADER, SAFE_METHODS, ReplicaRouter, replica_router
+
+
+class ReadYourWritesMiddleware:
+    """Pin a client's reads to the primary after it writes.
+
+    Successful responses to anything but GET, HEAD and OPTIONS carry the
+    write time in a short-lived cookie and an X-DB-Pin header. ReplicaRouter
+    keeps requests that send either back on the primary until the sticky
+    window has passed. Does nothing when no replicas are configured.
+    """
+
+    def __init__(self, app: ASGIApp, router: Optional[ReplicaRouter] = None):
+        self.app = app
+        self.router = router or replica_router
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not self.router.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message: Message) -> None:
+            # Failed writes changed nothing, so they leave the client's reads where they were
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                pin = self.router.pin()
+                headers = MutableHeaders(scope=message)
+                headers.append(PIN_HEADER, pin)
+                headers.append(
+                    "Set-Cookie",
+                    f"{PIN_COOKIE}={pin}; Max-Age={math.ceil(self.router.sticky_seconds)}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
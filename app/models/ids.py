@@ -0,0 +1,81 @@
+import os
+import time
+import uuid
+from typing import Optional
+
+from sqlalchemy import String
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator
+
+# Never generated, so a malformed id bound as this matches no row
+NIL_UUID = uuid.UUID(int=0)
+
+_last_ms = 0
+_sequence = 0
+
+
+def uuid7() -> uuid.UUID:
+    """Time-ordered UUID (RFC 9562 version 7).
+
+    The first 48 bits are the Unix time in milliseconds, so new keys land at the
+    right-hand edge of B-tree indexes instead of splitting random pages. Within
+    one millisecond the 12-bit rand_a field counts up from a random start, which
+    keeps ids from one process strictly increasing.
+    """
+    global _last_ms, _sequence
+    ms = time.time_ns() // 1_000_000
+    if ms > _last_ms:
+        _last_ms = ms
+        _sequence = int.from_bytes(os.urandom(2), "big") & 0x7FF
+    else:
+        # Same millisecond (or the clock stepped back): keep counting from the last id
+        _sequence += 1
+        if _sequence > 0xFFF:
+            _last_ms += 1
+            _sequence = 0
+        ms = _last_ms
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (ms & ((1 << 48) - 1)) << 80 | 0x7 << 76 | _sequence << 64 | 0b10 << 62 | rand_b
+    return uuid.UUID(int=value)
+
+
+def new_id() -> str:
+    """Primary key for a new row, in the string form the API exposes"""
+    return str(uuid7())
+
+
+def new_token() -> str:
+    """Unguessable token; version 4 keeps all 122 bits random, unlike time-ordered ids"""
+    return str(uuid.uuid4())
+
+
+class GUID(TypeDecorator):
+    """UUID key exposed to Python as its canonical string.
+
+    Stored as the native 16-byte uuid type on Postgres and as 36-character text
+    elsewhere, so models, schemas and JWT subjects keep passing ids around as
+    strings.
+    """
+    impl = String(36)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=True))
+        return dialect.type_descriptor(String(36))
+
+    def process_bind_param(self, value, dialect) -> Optional[object]:
+        if value is None or dialect.name != "postgresql":
+            return value
+        if isinstance(value, uuid.UUID):
+            return value
+        try:
+            return uuid.UUID(str(value))
+        except ValueError:
+            # Ids arrive from URLs and request bodies; a malformed one is simply not found
+            return NIL_UUID
+
+    def process_result_value(self, value, dialect) -> Optional[str]:
+        if value is None:
+            return None
+        return str(value)
@@ -0,0 +1,101 @@
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+from app.utils.metrics import db_pool_timeouts_total, db_pool_wait_seconds, observe_pool
+from config import settings
+
+
+class PoolMetrics:
+    """Connection acquisition figures for the engine's pool"""
+
+    def __init__(self):
+        self.acquisitions = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.acquisitions += 1
+        self.wait_seconds_total += seconds
+        if seconds > self.wait_seconds_max:
+            self.wait_seconds_max = seconds
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        """Current pool occupancy plus acquisition wait statistics"""
+        stats: Dict[str, Any] = {"pool_class": type(pool).__name__}
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=pool.overflow(),
+            )
+        avg = self.wait_seconds_total / self.acquisitions if self.acquisitions else 0.0
+        stats.update(
+            acquisitions=self.acquisitions,
+            timeouts=self.timeouts,
+            avg_wait_ms=round(avg * 1000, 3),
+            max_wait_ms=round(self.wait_seconds_max * 1000, 3),
+        )
+        return stats
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait to get a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        event.listen(self, "checkin", lambda *_: observe_pool(self))
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            pool_metrics.timeouts += 1
+            db_pool_timeouts_total.inc()
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            pool_metrics.record_wait(waited)
+            db_pool_wait_seconds.observe(waited)
+            observe_pool(self)
+
+
+def async_database_url(database_url: str) -> str:
+    """The URL with the async driver SQLAlchemy needs for plain postgresql:// URLs"""
+    if database_url.startswith("postgresql://"):
+        return database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return database_url
+
+
+def engine_options(database_url: str) -> Dict[str, Any]:
+    """Keyword arguments for create_async_engine built from Settings"""
+    options: Dict[str, Any] = {"echo": settings.db_echo}
+    backend = make_url(database_url).get_backend_name()
+    if backend == "sqlite":
+        # SQLite picks its own pool; the sizing knobs below do not apply
+        return options
+
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    if backend == "postgresql":
+        connect_args: Dict[str, Any] = {
+            "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+        }
+        if settings.db_statement_timeout_ms:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.db_statement_timeout_ms)}
+        options["connect_args"] = connect_args
+    return options
@@ -0,0 +1,67 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """SQL statement count and timings collected for one request"""
+
+    __slots__ = ("count", "total_seconds", "slowest_seconds", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def server_timing(self) -> str:
+        """Render as a Server-Timing header value"""
+        return (
+            f'db;dur={self.total_seconds * 1000:.2f};desc="{self.count} queries", '
+            f"db-slowest;dur={self.slowest_seconds * 1000:.2f}"
+        )
+
+
+# Set per request by QueryStatsMiddleware; the engine hooks record into whatever is current
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if elapsed * 1000 >= settings.slow_query_ms:
+        logger.warning(
+            "Slow query took %.1fms",
+            elapsed * 1000,
+            extra={"db_ms": round(elapsed * 1000, 2), "statement": statement},
+        )
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Time every statement the engine runs and attribute it to the current request; safe to call twice"""
+    sync_engine = engine.sync_engine
+    # A second set of hooks would count every statement twice
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,228 @@
+import asyncio
+import itertools
+import logging
+import math
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.requests import HTTPConnection
+
+from app.models.pool import InstrumentedQueuePool, async_database_url, engine_options
+from app.models.query_stats import instrument_engine
+from app.utils.metrics import db_replica_available, db_replica_lag_seconds
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+# Carry the time of a client's last write, so whichever worker serves its next read can keep it on
+# the primary: browsers send the cookie back, API clients echo the header
+PIN_COOKIE = "db_pin"
+PIN_HEADER = "X-DB-Pin"
+
+# Seconds the server is behind its primary; 0 when it has replayed everything it received
+LAG_QUERIES = {
+    "postgresql": (
+        "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END"
+    ),
+}
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """Whether error means the server could not be reached, rather than that a statement failed"""
+    if isinstance(error, exc.DBAPIError):
+        return error.connection_invalidated or isinstance(error, (exc.OperationalError, exc.InterfaceError))
+    return isinstance(error, (OSError, asyncio.TimeoutError))
+
+
+class Replica:
+    """One read replica, its engine and what the last health check found"""
+
+    def __init__(self, url: str):
+        self.url = async_database_url(url)
+        parsed = make_url(self.url)
+        self.name = f"{parsed.host}:{parsed.port}" if parsed.host else parsed.render_as_string(hide_password=True)
+        self.engine: Optional[AsyncEngine] = None
+        self.sessions: Optional[sessionmaker] = None
+        # Unknown until the first check, and treated as too far behind until then
+        self.lag: Optional[float] = None
+        self.down_until = 0.0
+        self.last_error: Optional[str] = None
+
+    def connect(self) -> None:
+        options = engine_options(self.url)
+        # The instrumented pool reports into the primary's pool metrics
+        if options.get("poolclass") is InstrumentedQueuePool:
+            options["poolclass"] = AsyncAdaptedQueuePool
+        self.engine = create_async_engine(self.url, **options)
+        instrument_engine(self.engine)
+        self.sessions = sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False, info={"replica": self.name})
+
+    def snapshot(self, now: float, max_lag: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "available": self.usable(now, max_lag),
+            "lag_seconds": None if self.lag is None else round(self.lag, 3),
+            "last_error": self.last_error,
+        }
+
+    def usable(self, now: float, max_lag: float) -> bool:
+        return self.down_until <= now and self.lag is not None and self.lag <= max_lag
+
+
+class ReplicaRouter:
+    """Chooses where read-only requests run: a healthy, caught-up replica or the primary.
+
+    Replicas are checked every check_interval seconds for reachability and
+    replication lag; one that fails a check, or whose connection fails during a
+    request, is skipped until it passes again, and one more than max_lag behind
+    is skipped until it catches up. With no usable replica reads go to the
+    primary.
+
+    A client that sends a write (any method other than GET, HEAD or OPTIONS)
+    reads from the primary for sticky_seconds after it, so it sees its own
+    changes. The write time travels with the client, in the PIN_COOKIE cookie
+    and PIN_HEADER header set on the write's response, so the pin holds on
+    every worker.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str] = (),
+        max_lag: float = 5.0,
+        sticky_seconds: float = 10.0,
+        check_interval: float = 2.0,
+        check_timeout: float = 1.0,
+        clock=time.monotonic,
+        wall_clock=time.time):
+        if urls and check_interval <= 0:
+            raise ValueError("Replica health checks need a positive interval")
+        self.replicas: List[Replica] = [Replica(url) for url in urls]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.sticky_seconds = sticky_seconds
+        self._clock = clock
+        # Pins are compared across workers, so they use wall-clock time
+        self._wall_clock = wall_clock
+        self._turn = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def pin(self) -> str:
+        """Value for PIN_COOKIE and PIN_HEADER on the response to a write"""
+        return f"{self._wall_clock():.3f}"
+
+    def pinned(self, connection: HTTPConnection) -> bool:
+        """Whether the client wrote within the last sticky_seconds, going by the pin it sent back"""
+        value = connection.headers.get(PIN_HEADER) or connection.cookies.get(PIN_COOKIE)
+        if not value:
+            return False
+        try:
+            written_at = float(value)
+        except ValueError:
+            return False
+        return written_at > self._wall_clock() - self.sticky_seconds
+
+    def pick(self, connection: Optional[HTTPConnection] = None) -> Optional[Replica]:
+        """Replica to serve a read for this client from, or None for the primary"""
+        if not self.replicas:
+            return None
+        if connection is not None and self.pinned(connection):
+            return None
+        now = self._clock()
+        usable = [replica for replica in self.replicas if replica.usable(now, self.max_lag)]
+        if not usable:
+            return None
+        return usable[next(self._turn) % len(usable)]
+
+    def mark_failed(self, replica: Replica, error: BaseException) -> None:
+        """Take a replica out of rotation until its next successful health check"""
+        if replica.down_until <= self._clock():
+            logger.warning("Read replica %s failed, sending its reads elsewhere: %s", replica.name, error)
+        replica.down_until = self._clock() + self.check_interval
+        replica.last_error = str(error) or type(error).__name__
+        db_replica_available.labels(replica.name).set(0)
+
+    async def _measure_lag(self, replica: Replica) -> Optional[float]:
+        async with replica.engine.connect() as conn:
+            query = LAG_QUERIES.get(conn.dialect.name, "SELECT 0")
+            lag = (await conn.execute(text(query))).scalar()
+        return None if lag is None else float(lag)
+
+    async def check(self, replica: Replica) -> None:
+        """Refresh a replica's reachability and lag"""
+        try:
+            lag = await asyncio.wait_for(self._measure_lag(replica), self.check_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.mark_failed(replica, e)
+            return
+        if replica.down_until > self._clock():
+            logger.info("Read replica %s is reachable again", replica.name)
+        replica.lag = lag
+        replica.down_until = 0.0
+        replica.last_error = None
+        db_replica_lag_seconds.labels(replica.name).set(math.inf if lag is None else lag)
+        db_replica_available.labels(replica.name).set(int(replica.usable(self._clock(), self.max_lag)))
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+    async def start(self) -> None:
+        """Connect to the replicas, check them once and keep checking them in the background"""
+        if not self.replicas:
+            return
+        for replica in self.replicas:
+            replica.connect()
+        await self.check_all()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            if replica.engine is not None:
+                await replica.engine.dispose()
+                replica.engine = None
+                replica.sessions = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.check_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Read replica health check failed")
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        now = self._clock()
+        return [replica.snapshot(now, self.max_lag) for replica in self.replicas]
+
+
+# Global instance
+replica_router = ReplicaRouter(
+    urls=settings.database_replica_urls,
+    max_lag=settings.db_replica_max_lag_seconds,
+    sticky_seconds=settings.db_replica_sticky_seconds,
+    check_interval=settings.db_replica_check_interval_seconds,
+    check_timeout=settings.db_replica_check_timeout_seconds,
+)
@@ -1,41 +1,49 @@
-import uuid
 import enum
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Enum
-from sqlalchemy.orm import relationship
+from typing import Optional
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Enum, Index, Integer, JSON, LargeBinary, DDL, event, text
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.ext.declarative import declarative_base
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, functions
+from sqlalchemy.ext.compiler import compiles
 from config import settings
-# import os
+from app.models.pool import async_database_url, engine_options, pool_metrics
+from app.models.query_stats import instrument_engine
+from app.models.ids import GUID, new_id, new_token
 
-database_url = settings.database_url
+database_url = async_database_url(settings.database_url)
 
-# if database_url.startswith("postgresql://") and os.environ.get("ALEMBIC_RUNNING"):
-#     database_url = database_url.replace("postgresql://", "postgresql+asyncpg://")
-if database_url.startswith("postgresql://"):
-    database_url = database_url.replace("postgresql://", "postgresql+asyncpg://")
-
-engine = create_async_engine(database_url, echo=True)
+# Built by init_engine() on startup rather than at import, so importing the models (tests, tools,
+# migrations) neither loads the database driver nor sets up a pool
+engine: Optional[AsyncEngine] = None
 AsyncSessionLocal: sessionmaker[AsyncSession] = sessionmaker(
-    bind=engine,
     class_=AsyncSession,
     expire_on_commit=False,
 )
 Base = declarative_base()
 
-# engine = None
-# AsyncSessionLocal = None
-
-# def init_async_db():
-#     global engine, AsyncSessionLocal
-#     engine = create_async_engine(database_url, echo=True)
-#     AsyncSessionLocal = sessionmaker(
-#         bind=engine,
-#         class_=AsyncSession,
-#         expire_on_commit=False,
-#     )
+def init_engine() -> AsyncEngine:
+    """Create the application engine and bind AsyncSessionLocal to it, once"""
+    global engine
+    if engine is None:
+        engine = create_async_engine(database_url, **engine_options(database_url))
+        instrument_engine(engine)
+        AsyncSessionLocal.configure(bind=engine)
+    return engine
+
+async def dispose_engine() -> None:
+    """Close the engine's connections; the next init_engine() builds a fresh one"""
+    global engine
+    if engine is not None:
+        await engine.dispose()
+        engine = None
+
+@compiles(functions.now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    # Match SQLAlchemy's SQLite datetime storage format so keyset cursors compare correctly
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
 
 class TicketStatus(enum.Enum):
     OPEN = "Open"
@@ -46,7 +54,8 @@ class TicketStatus(enum.Enum):
 class BaseModel(Base):
     __abstract__ = True
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    # Time-ordered so inserts append to the primary key index
+    id = Column(GUID, primary_key=True, default=new_id)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -69,18 +78,101 @@ class User(BaseModel):
 
 class Ticket(BaseModel):
     __tablename__ = "tickets"
+    __table_args__ = (
+        # Agent queues: get_ticket_rows filters on agent_id, optionally by status, keyset-ordered
+        Index("ix_tickets_agent_created", "agent_id", "created_at", "id"),
+        Index("ix_tickets_agent_status_created", "agent_id", "status", "created_at", "id"),
+        # Customer listings: get_ticket_rows by customer_id, keyset-ordered
+        Index("ix_tickets_customer_created", "customer_id", "created_at", "id"),
+        # Unclaimed work queue, kept small by only indexing open tickets
+        Index(
+            "ix_tickets_open_created",
+            "created_at",
+            "id",
+            postgresql_where=text("status = 'OPEN'"),
+            sqlite_where=text("status = 'OPEN'"),
+        ),
+    )
 
     title = Column(String(100), nullable=False)
-    description = Column(String, nullable=False)
+    # Free-text bodies can be large, so they are only loaded when asked for with undefer_group("body");
+    # bodies over ticket_body_inline_max_bytes keep a preview here and the full text in the body store
+    description = deferred(Column(String, nullable=False), group="body", raiseload=True)
+    description_blob = Column(String(64), nullable=True)
     status = Column(Enum(TicketStatus), default=TicketStatus.OPEN, nullable=False)
-    customer_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    agent_id = Column(String(36), ForeignKey("users.id"), nullable=True, default=None)
-    resolution_notes = Column(String, nullable=True)
-    embed_token = Column(String, unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
-
-async def get_db():
-    async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
\ No newline at end of file
+    customer_id = Column(GUID, ForeignKey("users.id"), nullable=False)
+    agent_id = Column(GUID, ForeignKey("users.id"), nullable=True, default=None)
+    resolution_notes = deferred(Column(String, nullable=True), group="body", raiseload=True)
+    resolution_notes_blob = Column(String(64), nullable=True)
+    embed_token = Column(GUID, unique=True, nullable=False, default=new_token)
+
+class TicketCounter(Base):
+    """Ticket counts per status and assigned agent, kept in step with every ticket write.
+
+    Each key is spread over a few shard rows so concurrent writers rarely wait
+    on the same row lock; readers sum the shards.
+    """
+    __tablename__ = "ticket_counters"
+
+    status = Column(Enum(TicketStatus), primary_key=True)
+    # "" stands for unassigned so the key can be part of the primary key
+    agent_id = Column(String(36), primary_key=True, default="")
+    shard = Column(Integer, primary_key=True, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+class TicketBlob(Base):
+    """Content-addressed ticket bodies too large to keep inline, keyed by the sha256 of the text"""
+    __tablename__ = "ticket_blobs"
+
+    digest = Column(String(64), primary_key=True)
+    # Prefixed with the encoding, see app.api.bodies
+    data = Column(LargeBinary, nullable=False)
+
+class OutboxEvent(BaseModel):
+    """Side-effect work recorded in the same transaction as the ticket change that caused it"""
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # The worker only ever scans undelivered events that are due
+        Index(
+            "ix_outbox_events_pending",
+            "available_at",
+            postgresql_where=text("processed_at IS NULL"),
+            sqlite_where=text("processed_at IS NULL"),
+        ),
+    )
+
+    event_type = Column(String(50), nullable=False)
+    ticket_id = Column(GUID, nullable=False)
+    payload = Column(JSON, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    # Next time the event may be claimed; pushed forward while leased and on retry backoff
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String, nullable=True)
+
+def pool_status() -> dict:
+    """Runtime connection pool metrics for the application engine"""
+    if engine is None:
+        return {}
+    return pool_metrics.snapshot(engine.pool)
+
+# Weighted full-text document for Postgres search; kept out of the mapper so other
+# dialects (SQLite in tests) can still create the table
+TICKET_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(resolution_notes, '')), 'C')"
+)
+event.listen(
+    Ticket.__table__,
+    "after_create",
+    DDL(
+        f"ALTER TABLE tickets ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({TICKET_SEARCH_DOCUMENT}) STORED"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Ticket.__table__,
+    "after_create",
+    DDL("CREATE INDEX ix_tickets_search_vector ON tickets USING gin (search_vector)").execute_if(dialect="postgresql"),
+)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, model_validator
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -70,7 +70,40 @@ class TicketUpdate(BaseModel):
     resolution_notes: Optional[str] = None
 
 class TicketAssign(BaseModel):
-    agent_id: str
+    agent_id: Optional[str] = None
+    # Let the server pick the least-loaded agent instead of naming one
+    auto: bool = False
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if self.auto == bool(self.agent_id):
+            raise ValueError("Provide either agent_id or auto=true")
+        return self
+
+class TicketBulkCreate(BaseModel):
+    # Items are validated one by one so a bad item fails alone instead of the whole batch
+    tickets: List[Dict[str, Any]] = Field(..., min_length=1, max_length=1000)
+
+class TicketBulkUpdateItem(BaseModel):
+    id: str
+    status: Optional[TicketStatus] = None
+    agent_id: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_status(self):
+        # agent_id may be null to unassign, but status is a NOT NULL column
+        if "status" in self.model_fields_set and self.status is None:
+            raise ValueError("status cannot be null")
+        return self
+
+class TicketBulkUpdate(BaseModel):
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=1000)
+
+class BulkItemResult(BaseModel):
+    index: int
+    success: bool
+    id: Optional[str] = None
+    error: Optional[str] = None
 
 class TicketResponse(TicketBase):
     id: str
@@ -83,4 +116,13 @@ class TicketResponse(TicketBase):
     embed_token: str
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TicketEmbedResponse(BaseModel):
+    title: str
+    status: TicketStatus
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
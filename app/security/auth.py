@@ -1,28 +1,42 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models.ticket import User
-from app.schemas.ticket import UserTokenData
+from app.schemas.ticket import UserTokenData, UserResponse
+from app.security.hashing import password_hasher
+from app.security.tokens import InvalidToken, TokenVerifier
+from app.utils.cache import TTLCache
+from app.utils.metrics import jwt_verifications_total
 from config import settings
 
 
 class AuthService:
     def __init__(self):
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.hasher = password_hasher
         self.secret_key = settings.jwt_secret_key
         self.algorithm = settings.algorithm
         self.access_token_expire_minutes = settings.access_token_expire_minutes
+        self.tokens = TokenVerifier(
+            keys=settings.jwt_signing_keys,
+            active_kid=settings.jwt_active_kid,
+            default_key=self.secret_key,
+            algorithm=self.algorithm,
+            backend=settings.jwt_backend,
+            cache_size=settings.jwt_verify_cache_size,
+        )
+        self.principal_cache = TTLCache(
+            max_size=settings.principal_cache_max_size,
+            ttl=settings.principal_cache_ttl_seconds,
+        )
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify a plain password against its hash"""
-        return self.pwd_context.verify(plain_password, hashed_password)
+        return await self.hasher.verify(plain_password, hashed_password)
 
-    def get_password_hash(self, password: str) -> str:
+    async def get_password_hash(self, password: str) -> str:
         """Hash a password"""
-        return self.pwd_context.hash(password)
+        return await self.hasher.hash(password)
     
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
         """Create JWT access token"""
@@ -33,18 +47,20 @@ class AuthService:
             expire = datetime.now(timezone.utc) + timedelta(minutes=self.access_token_expire_minutes)
 
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
-        return encoded_jwt
+        return self.tokens.sign(to_encode)
     
     def verify_token(self, token: str) -> Optional[UserTokenData]:
         """Verify and decode JWT token"""
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            payload = self.tokens.verify(token)
             email: str = payload.get("email")
             if email is None:
+                jwt_verifications_total.labels("invalid").inc()
                 return None
+            jwt_verifications_total.labels("valid").inc()
             return UserTokenData(email=email, id=payload.get("id"))
-        except JWTError:
+        except InvalidToken:
+            jwt_verifications_total.labels("invalid").inc()
             return None
 
     async def authenticate_user(self, db: AsyncSession, email: str, password: str) -> Optional[User]:
@@ -52,7 +68,7 @@ class AuthService:
         user = await self.get_user_by_email(db, email)
         if not user:
             return None
-        if not self.verify_password(password, user.hashed_password):
+        if not await self.verify_password(password, user.hashed_password):
             return None
         return user
 
@@ -61,6 +77,25 @@ class AuthService:
         result = await db.execute(select(User).filter(User.email == email))
         return result.scalar_one_or_none()
 
+    async def get_principal(self, db: AsyncSession, email: str) -> Optional[UserResponse]:
+        """Get a read-only snapshot of the user, served from the principal cache when possible"""
+        principal = self.principal_cache.get(email)
+        if principal is not None:
+            return principal
+
+        user = await self.get_user_by_email(db, email)
+        if user is None:
+            return None
+        principal = UserResponse.model_validate(user)
+        self.principal_cache.set(email, principal)
+        return principal
+
+    def invalidate_principal(self, *emails: Optional[str]) -> None:
+        """Drop cached principals so the next request reloads them"""
+        for email in emails:
+            if email:
+                self.principal_cache.pop(email)
+
 
 # Global instance
 auth_service = AuthService()
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from app.utils.metrics import password_hash_duration_seconds, password_hash_queue_depth, password_hash_rejected_total
+from config import settings
+
+
+_pwd_context = None
+
+
+def pwd_context():
+    """The bcrypt CryptContext, built on first use since passlib is slow to import"""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
+
+def _hash(password: str) -> str:
+    return pwd_context().hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context().verify(plain_password, hashed_password)
+
+
+def _timed(func, *args):
+    """Run func in the worker and report how long the work itself took"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when the hashing pool and its queue are full"""
+
+
+class OperationStats:
+    """Running latency figures for one kind of hashing operation"""
+
+    def __init__(self):
+        self.count = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.run_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, total: float, run: float) -> None:
+        self.count += 1
+        self.total_seconds += total
+        self.run_seconds += run
+        if total > self.max_seconds:
+            self.max_seconds = total
+
+    def snapshot(self) -> Dict[str, float]:
+        avg = self.total_seconds / self.count if self.count else 0.0
+        avg_run = self.run_seconds / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "rejected": self.rejected,
+            "avg_ms": round(avg * 1000, 3),
+            "avg_wait_ms": round((avg - avg_run) * 1000, 3),
+            "max_ms": round(self.max_seconds * 1000, 3),
+        }
+
+
+class PasswordHasher:
+    """Runs bcrypt work on a bounded executor so the event loop never blocks on it"""
+
+    def __init__(self, executor: str = "thread", max_workers: Optional[int] = None, max_queue: int = 64):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {executor}")
+        self.executor_type = executor
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        self.stats = {"hash": OperationStats(), "verify": OperationStats()}
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._in_flight - self.max_workers)
+
+    async def _run(self, operation: str, func, *args):
+        # The counter is only touched from the event loop thread, so no lock is needed
+        if self._in_flight >= self.max_workers + self.max_queue:
+            self.stats[operation].rejected += 1
+            password_hash_rejected_total.labels(operation).inc()
+            raise HashingPoolSaturated(f"Password {operation} pool is saturated")
+
+        self._in_flight += 1
+        password_hash_queue_depth.set(self.queue_depth)
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_seconds = await loop.run_in_executor(self._get_executor(), _timed, func, *args)
+        finally:
+            self._in_flight -= 1
+            password_hash_queue_depth.set(self.queue_depth)
+        elapsed = time.perf_counter() - start
+        self.stats[operation].record(elapsed, run_seconds)
+        password_hash_duration_seconds.labels(operation).observe(elapsed)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hash a password on the pool"""
+        return await self._run("hash", _hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash on the pool"""
+        return await self._run("verify", _verify, plain_password, hashed_password)
+
+    def metrics(self) -> Dict[str, object]:
+        """Snapshot of pool occupancy and per-operation latency"""
+        return {
+            "executor": self.executor_type,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "operations": {name: stats.snapshot() for name, stats in self.stats.items()},
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global instance
+password_hasher = PasswordHasher(
+    executor=settings.password_hash_executor,
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+)
@@ -0,0 +1,173 @@
+import base64
+import binascii
+import hashlib
+import json
+import time
+from typing import Any, Dict, Optional
+
+from app.utils.cache import TTLCache
+
+
+class InvalidToken(Exception):
+    """Raised when a token is malformed, expired, unsigned by a known key or otherwise rejected"""
+
+
+class JoseBackend:
+    """JWT encoding through python-jose, the default dependency"""
+
+    name = "jose"
+
+    def __init__(self):
+        from jose import JWTError, jwt
+        self._jwt = jwt
+        self._error = JWTError
+
+    def encode(self, claims: Dict[str, Any], key: str, algorithm: str, headers: Optional[dict]) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+    def decode(self, token: str, key: str, algorithm: str) -> Dict[str, Any]:
+        try:
+            return self._jwt.decode(token, key, algorithms=[algorithm])
+        except self._error as e:
+            raise InvalidToken(str(e)) from e
+
+
+class PyJWTBackend:
+    """JWT encoding through PyJWT (pip install pyjwt), which verifies noticeably faster"""
+
+    name = "pyjwt"
+
+    def __init__(self):
+        import jwt
+        self._jwt = jwt
+        self._error = jwt.PyJWTError
+
+    def encode(self, claims: Dict[str, Any], key: str, algorithm: str, headers: Optional[dict]) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+    def decode(self, token: str, key: str, algorithm: str) -> Dict[str, Any]:
+        try:
+            return self._jwt.decode(token, key, algorithms=[algorithm])
+        except self._error as e:
+            raise InvalidToken(str(e)) from e
+
+
+def unverified_header(token: str) -> Dict[str, Any]:
+    """Decoded JOSE header of a compact JWT, read without checking the signature"""
+    segment = token.split(".", 1)[0]
+    try:
+        header = json.loads(base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4)))
+    except (binascii.Error, ValueError) as e:
+        raise InvalidToken("Malformed token header") from e
+    if not isinstance(header, dict):
+        raise InvalidToken("Malformed token header")
+    return header
+
+
+BACKEND_NAMES = ("auto", "jose", "pyjwt")
+
+
+def load_backend(name: str = "auto"):
+    """JWT backend by name; "auto" prefers PyJWT when it is installed"""
+    if name == "jose":
+        return JoseBackend()
+    if name == "pyjwt":
+        return PyJWTBackend()
+    if name == "auto":
+        try:
+            return PyJWTBackend()
+        except ImportError:
+            return JoseBackend()
+    raise ValueError(f"Unsupported JWT backend: {name!r}")
+
+
+class TokenVerifier:
+    """Signs and verifies JWTs against a set of keys, caching successful verifications.
+
+    Keys are identified by kid. New tokens are signed with active_kid and carry it
+    in their header; tokens are verified with the key their kid names, and tokens
+    without a kid with default_key, so keys can be rotated by adding the new one,
+    switching active_kid and dropping the old one once its tokens have expired.
+
+    backend is a backend object or one of BACKEND_NAMES, loaded on first use so
+    the JWT library is not imported until a token is signed or verified.
+
+    Verified payloads are cached in an LRU keyed by a digest of the token until
+    the token's exp. Adding keys leaves the cache intact; a cached token whose
+    key was removed is rejected. Only touched from the event loop thread.
+    """
+
+    def __init__(
+        self,
+        keys: Dict[str, str],
+        active_kid: Optional[str] = None,
+        default_key: Optional[str] = None,
+        algorithm: str = "HS256",
+        backend=None,
+        cache_size: int = 10000,
+        clock=time.time):
+        if active_kid is not None and active_kid not in keys:
+            raise ValueError(f"Active signing key {active_kid!r} is not configured")
+        if active_kid is None and default_key is None:
+            raise ValueError("A signing key is required")
+        if isinstance(backend, str) and backend not in BACKEND_NAMES:
+            raise ValueError(f"Unsupported JWT backend: {backend!r}")
+        self.keys = dict(keys)
+        self.active_kid = active_kid
+        self.default_key = default_key
+        self.algorithm = algorithm
+        self._backend = backend or "auto"
+        self._clock = clock
+        self.cache = TTLCache(max_size=cache_size, ttl=0, clock=clock)
+
+    @property
+    def backend(self):
+        if isinstance(self._backend, str):
+            self._backend = load_backend(self._backend)
+        return self._backend
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        """Encode claims with the active key, naming it in the header"""
+        if self.active_kid is None:
+            return self.backend.encode(claims, self.default_key, self.algorithm, None)
+        return self.backend.encode(claims, self.keys[self.active_kid], self.algorithm, {"kid": self.active_kid})
+
+    def _key(self, kid: Optional[str]) -> str:
+        # kid comes from the unverified header and may be any JSON value
+        if kid is not None and not isinstance(kid, str):
+            raise InvalidToken("Malformed token kid")
+        key = self.default_key if kid is None else self.keys.get(kid)
+        if key is None:
+            raise InvalidToken(f"Unknown signing key {kid!r}")
+        return key
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Verified claims of token; raises InvalidToken"""
+        digest = None
+        if self.cache.max_size > 0:
+            digest = hashlib.blake2b(token.encode(), digest_size=16).digest()
+            cached = self.cache.get(digest)
+            if cached is not None:
+                kid, payload = cached
+                # Still signed by a key we accept; entries expire with the token itself
+                self._key(kid)
+                return payload
+
+        # Without rotation keys everything is checked against default_key, so skip reading the header
+        kid = unverified_header(token).get("kid") if self.keys else None
+        payload = self.backend.decode(token, self._key(kid), self.algorithm)
+        exp = payload.get("exp")
+        if digest is not None and isinstance(exp, (int, float)):
+            ttl = exp - self._clock()
+            if ttl > 0:
+                self.cache.set(digest, (kid, payload), ttl=ttl)
+        return payload
+
+    def add_key(self, kid: str, key: str) -> None:
+        self.keys[kid] = key
+
+    def remove_key(self, kid: str) -> None:
+        """Stop accepting tokens signed with kid, cached or not"""
+        if kid == self.active_kid:
+            raise ValueError("Cannot remove the active signing key")
+        self.keys.pop(kid, None)
@@ -0,0 +1,184 @@
+import abc
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Size-bounded LRU mapping whose entries expire after a TTL.
+
+    Only ever touched from the event loop thread, so it takes no locks.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry and mark it as recently used"""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store an entry, evicting the least recently used one when full"""
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Drop an entry if present"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+
+def payload_etag(payload: bytes) -> str:
+    """Strong ETag derived from a serialized response body"""
+    return '"' + hashlib.blake2b(payload, digest_size=16).hexdigest() + '"'
+
+
+class CacheBackend(abc.ABC):
+    """Async store for serialized payloads shared by the read-through caches"""
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def delete(self, *keys: str) -> None:
+        ...
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__}
+
+
+class NullCacheBackend(CacheBackend):
+    """Caching disabled; every read goes to the database"""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        pass
+
+    async def delete(self, *keys: str) -> None:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU with TTL; the local stand-in for a shared cache"""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 30.0):
+        self.cache = TTLCache(max_size=max_size, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self.cache.set(key, value, ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.cache.pop(key)
+
+    def metrics(self) -> Dict[str, Any]:
+        return dict(
+            super().metrics(),
+            size=len(self.cache),
+            hits=self.cache.hits,
+            misses=self.cache.misses,
+        )
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache shared by every worker, backed by Redis.
+
+    Redis errors are logged and treated as misses so an outage only costs
+    database reads.
+    """
+
+    def __init__(self, url: str, ttl: float = 30.0, prefix: str = "ticket-api:"):
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("A redis:// cache URL requires the redis package (pip install redis)") from e
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.errors = 0
+        self._redis_error = redis.RedisError
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self.client.get(self.prefix + key)
+        except self._redis_error:
+            self._failed("get")
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        expires = math.ceil(self.ttl if ttl is None else ttl)
+        try:
+            await self.client.set(self.prefix + key, value, ex=expires)
+        except self._redis_error:
+            self._failed("set")
+
+    async def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        try:
+            await self.client.delete(*(self.prefix + key for key in keys))
+        except self._redis_error:
+            self._failed("delete")
+
+    def _failed(self, operation: str) -> None:
+        self.errors += 1
+        logger.warning("Redis cache %s failed", operation, exc_info=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        return dict(super().metrics(), errors=self.errors)
+
+
+def build_cache_backend(url: Optional[str], max_size: int, ttl: float) -> CacheBackend:
+    """Cache backend for a URL: "memory" (default), "none" or redis://..."""
+    if url == "none" or ttl <= 0:
+        return NullCacheBackend()
+    if not url or url == "memory":
+        return MemoryCacheBackend(max_size=max_size, ttl=ttl)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend(url, ttl=ttl)
+    raise ValueError(f"Unsupported cache URL: {url}")
@@ -0,0 +1,112 @@
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# With PROMETHEUS_MULTIPROC_DIR set (one shared, emptied-at-deploy directory per host),
+# every uvicorn worker writes its samples to its own mmap'd files and /metrics sums them.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+http_requests_total = Counter(
+    "http_requests_total",
+    "HTTP requests by route template, method and status code",
+    ["method", "route", "status"],
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and method",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+db_pool_overflow = Gauge(
+    "db_pool_overflow_connections",
+    "Connections open beyond the pool size",
+    multiprocess_mode="livesum",
+)
+db_pool_wait_seconds = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting to acquire a pooled connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+db_pool_timeouts_total = Counter(
+    "db_pool_timeouts_total",
+    "Connection acquisitions that timed out",
+)
+
+db_replica_lag_seconds = Gauge(
+    "db_replica_lag_seconds",
+    "Replication lag of each read replica at its last health check",
+    ["replica"],
+    multiprocess_mode="livemax",
+)
+db_replica_available = Gauge(
+    "db_replica_available",
+    "1 while a read replica is reachable and within the allowed lag",
+    ["replica"],
+    multiprocess_mode="livemin",
+)
+
+password_hash_queue_depth = Gauge(
+    "password_hash_queue_depth",
+    "Hashing operations waiting for a free pool worker",
+    multiprocess_mode="livesum",
+)
+password_hash_duration_seconds = Histogram(
+    "password_hash_duration_seconds",
+    "Password hashing latency including queue wait",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+password_hash_rejected_total = Counter(
+    "password_hash_rejected_total",
+    "Hashing operations rejected because the pool was saturated",
+    ["operation"],
+)
+
+jwt_verifications_total = Counter(
+    "jwt_verifications_total",
+    "JWT verifications by outcome",
+    ["result"],
+)
+
+outbox_events_total = Counter(
+    "outbox_events_total",
+    "Outbox events handled by the background worker, by outcome",
+    ["result"],
+)
+
+
+def observe_pool(pool) -> None:
+    """Refresh the pool gauges from a queue pool's current state"""
+    db_pool_checked_out.set(pool.checkedout())
+    db_pool_overflow.set(max(0, pool.overflow()))
+
+
+def render_latest() -> tuple:
+    """Exposition payload and content type, aggregated across workers when multiprocess"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead() -> None:
+    """Drop this worker's live gauges from the shared multiprocess directory"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
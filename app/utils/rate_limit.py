@@ -0,0 +1,36 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+
+class RateLimiter:
+    """Per-key token bucket: `rate` requests per second with bursts up to `burst`.
+
+    Buckets live in an LRU bounded by `max_keys`, so a flood of distinct keys
+    cannot grow memory without limit. Only touched from the event loop thread.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 100000, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+
+    def acquire(self, key: Hashable) -> float:
+        """Take one token for key; 0 when allowed, otherwise seconds until the next token"""
+        now = self._clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now]
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            tokens, updated = bucket
+            bucket[0] = min(float(self.burst), tokens + (now - updated) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / self.rate
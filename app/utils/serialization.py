@@ -0,0 +1,55 @@
+import enum
+import json
+import uuid
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Sequence
+
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pip install orjson for the fast path
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    # Mirrors how pydantic renders these types, so both paths produce the same JSON
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact JSON bytes, through orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def row_serializer(fields: Sequence[str]) -> Callable[[Iterable[Any]], Dict[str, Any]]:
+    """Build a function turning a result row, selected in fields order, into a JSON-ready dict.
+
+    Meant for rows selected straight from columns: values come out of the
+    database already typed, so there is no per-row model validation.
+    """
+    names = tuple(fields)
+
+    def serialize(row: Iterable[Any]) -> Dict[str, Any]:
+        return dict(zip(names, row))
+
+    return serialize
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered by dumps(), skipping FastAPI's jsonable_encoder pass"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,295 @@
+"""Load test and latency benchmark for the ticket API.
+
+Boots main.app in-process against a throwaway database (SQLite via aiosqlite
+by default, or any DATABASE_URL passed with --database-url and --destroy-data),
+seeds users and tickets, then drives each API flow concurrently and reports p50/p95/p99
+latency, throughput and SQL statements per request.
+
+    python -m benchmarks.api_bench
+    python -m benchmarks.api_bench --tickets 50000 --concurrency 50
+    python -m benchmarks.api_bench --database-url postgresql+asyncpg://... --destroy-data
+    python -m benchmarks.api_bench --save benchmarks/baselines/api_sqlite.json
+    python -m benchmarks.api_bench --compare benchmarks/baselines/api_sqlite.json
+
+--compare exits non-zero when a flow's p95 latency regresses beyond
+--tolerance against the saved baseline, or its queries per request by more
+than QUERY_SLACK.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+PASSWORD = "benchmark-password"
+
+# Queries per request vary by about 0.01 between identical runs with cache hit rates
+QUERY_SLACK = 0.05
+
+_query_counter: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar("bench_query_counter", default=None)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(values))
+    return values[max(0, min(len(values), rank) - 1)]
+
+
+class FlowResult:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.queries: List[int] = []
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def summary(self) -> Dict[str, float]:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "throughput_rps": round(count / self.elapsed, 1) if self.elapsed else 0.0,
+            "queries_per_request": round(sum(self.queries) / count, 2) if count else 0.0,
+        }
+
+
+class Benchmark:
+    def __init__(self, args):
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.customers: List[dict] = []
+        self.agents: List[dict] = []
+        self.admins: List[dict] = []
+        self.ticket_ids: List[str] = []
+
+    async def seed(self):
+        from sqlalchemy import insert
+        from app.models.ids import new_id, new_token
+        from app.models.ticket import AsyncSessionLocal, User, Ticket, TicketStatus
+        from app.security.auth import auth_service
+
+        hashed_password = await auth_service.get_password_hash(PASSWORD)
+        roles = (
+            [("customer", self.customers)] * self.args.customers
+            + [("agent", self.agents)] * self.args.agents
+            + [("admin", self.admins)]
+        )
+        users = []
+        for index, (role, bucket) in enumerate(roles):
+            user = {
+                "id": new_id(),
+                "first_name": "Bench",
+                "last_name": f"User{index}",
+                "email": f"bench-{role}-{index}@example.com",
+                "hashed_password": hashed_password,
+                "role": role,
+                "is_activated": True,
+            }
+            users.append(user)
+            bucket.append(user)
+
+        statuses = list(TicketStatus)
+        tickets = []
+        for index in range(self.args.tickets):
+            agent = self.random.choice(self.agents) if self.random.random() < 0.6 else None
+            tickets.append({
+                "id": new_id(),
+                "title": f"Ticket {index}",
+                "description": "Printer on fire. " * self.random.randint(1, 20),
+                "status": self.random.choice(statuses),
+                "customer_id": self.random.choice(self.customers)["id"],
+                "agent_id": agent["id"] if agent else None,
+                "embed_token": new_token(),
+            })
+        self.ticket_ids = [ticket["id"] for ticket in tickets]
+
+        async with AsyncSessionLocal() as session:
+            await session.execute(insert(User), users)
+            for start in range(0, len(tickets), 1000):
+                await session.execute(insert(Ticket), tickets[start:start + 1000])
+            await session.commit()
+
+        for user in users:
+            user["token"] = auth_service.create_access_token({"email": user["email"], "id": user["id"]})
+
+    @staticmethod
+    def headers(user: dict) -> dict:
+        return {"Authorization": f"Bearer {user['token']}"}
+
+    def flows(self) -> Dict[str, Callable]:
+        pick = self.random.choice
+        return {
+            "register": lambda c: c.post("/auth/register", json={
+                "first_name": "New", "last_name": "User", "password": PASSWORD,
+                "email": f"bench-new-{uuid.uuid4().hex}@example.com",
+            }),
+            "login": lambda c: c.post("/auth/login", json={"email": pick(self.customers)["email"], "password": PASSWORD}),
+            "create": lambda c: c.post(
+                "/tickets/", json={"title": "Bench ticket", "description": "Created by the benchmark"},
+                headers=self.headers(pick(self.customers)),
+            ),
+            "list_my": lambda c: c.get("/tickets/my", headers=self.headers(pick(self.customers))),
+            "list_agent": lambda c: c.get("/tickets/", params={"ticket_id": "any"}, headers=self.headers(pick(self.agents))),
+            "get": lambda c: c.get(f"/tickets/{pick(self.ticket_ids)}", headers=self.headers(pick(self.agents))),
+            "patch": lambda c: c.patch(
+                f"/tickets/{pick(self.ticket_ids)}", json={"status": "In Progress", "resolution_notes": "Looking"},
+                headers=self.headers(pick(self.agents)),
+            ),
+            "assign": lambda c: c.patch(
+                f"/tickets/{pick(self.ticket_ids)}/assign", json={"agent_id": pick(self.agents)["id"]},
+                headers=self.headers(self.admins[0]),
+            ),
+        }
+
+    async def run_flow(self, client, name: str, request: Callable, total: int) -> FlowResult:
+        result = FlowResult(name)
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+
+        async def one():
+            async with semaphore:
+                counter = [0]
+                _query_counter.set(counter)
+                start = time.perf_counter()
+                response = await request(client)
+                result.latencies.append(time.perf_counter() - start)
+                result.queries.append(counter[0])
+                if response.status_code >= 400 and response.status_code != 404:
+                    result.errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    async def run(self) -> Dict[str, object]:
+        import httpx
+        from sqlalchemy import event
+        from main import app
+        from app.models.ticket import init_engine
+
+        # The lifespan reuses this engine, so every statement the app runs is counted
+        engine = init_engine()
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def count_query(*_):
+            counter = _query_counter.get()
+            if counter is not None:
+                counter[0] += 1
+
+        results = {}
+        async with app.router.lifespan_context(app):
+            await self.seed()
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                flows = self.flows()
+                selected = self.args.flows or list(flows)
+                for name in selected:
+                    total = self.args.auth_requests if name in ("register", "login") else self.args.requests
+                    flow = await self.run_flow(client, name, flows[name], total)
+                    results[name] = flow.summary()
+                    print(format_row(name, results[name]), flush=True)
+
+        return {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "database": engine.url.get_backend_name(),
+                "customers": self.args.customers,
+                "agents": self.args.agents,
+                "tickets": self.args.tickets,
+                "concurrency": self.args.concurrency,
+            },
+            "flows": results,
+        }
+
+
+def format_row(name: str, summary: Dict[str, float]) -> str:
+    return (
+        f"{name:<12} n={summary['requests']:<6} err={summary['errors']:<4} "
+        f"p50={summary['p50_ms']:>8.2f}ms p95={summary['p95_ms']:>8.2f}ms p99={summary['p99_ms']:>8.2f}ms "
+        f"{summary['throughput_rps']:>8.1f} req/s {summary['queries_per_request']:>5.2f} q/req"
+    )
+
+
+def compare(report: Dict[str, object], baseline_path: str, tolerance: float) -> List[str]:
+    """List flows whose p95 latency or query count regressed beyond tolerance"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["flows"]
+    regressions = []
+    for name, current in report["flows"].items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["queries_per_request"] > previous["queries_per_request"] + QUERY_SLACK:
+            regressions.append(
+                f"{name}: queries/request {previous['queries_per_request']} -> {current['queries_per_request']}"
+            )
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Database to benchmark against (default: temporary SQLite file); "
+                        "users and tickets are seeded into it and then modified")
+    parser.add_argument("--destroy-data", action="store_true", help="Confirm that --database-url may be written to")
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--agents", type=int, default=20)
+    parser.add_argument("--tickets", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per ticket flow")
+    parser.add_argument("--auth-requests", type=int, default=40, help="Requests per bcrypt-bound flow")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--flows", nargs="*", help="Subset of flows to run")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--save", help="Write the JSON report to this path")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p95 regression ratio")
+    args = parser.parse_args(argv)
+    if args.database_url and not args.destroy_data:
+        parser.error("seeding writes users and tickets into --database-url; pass --destroy-data to confirm")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="ticket-bench-")
+    # Settings are read at import time, so configure the environment before importing the app
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault("DB_ECHO", "false")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    report = asyncio.run(Benchmark(args).run())
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved report to {args.save}")
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
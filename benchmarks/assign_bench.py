@@ -0,0 +1,244 @@
+"""Auto-assignment throughput under contention.
+
+Seeds agents and a queue of unassigned open tickets in a throwaway database
+(SQLite via aiosqlite by default, or --database-url, whose tables are dropped
+and recreated), then:
+
+  heap    reserve/release cycles per second on the in-memory agent heap
+  queue   --assigners concurrent callers draining the queue through
+          TicketService.auto_assign_queue in batches of --batch
+  single  --assigners concurrent callers auto-assigning random tickets one at a
+          time, so many of them race for the same rows
+  claim   one caller per agent pulling tickets through
+          TicketService.claim_next_ticket until the queue is empty
+
+and reports assignments per second, lost races and how evenly the work was
+spread. Each run checks that no ticket was assigned twice.
+
+    python -m benchmarks.assign_bench
+    python -m benchmarks.assign_bench --database-url postgresql+asyncpg://... --destroy-data --assigners 50
+
+On SQLite there is no SKIP LOCKED, so concurrent queue drainers pick the same
+rows and all but one lose the race; Postgres numbers are the meaningful ones.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from typing import Dict
+
+
+async def seed(args) -> Dict[str, list]:
+    from sqlalchemy import insert
+    from app.models.ids import new_id, new_token
+    from app.models.ticket import AsyncSessionLocal, Base, Ticket, User, init_engine
+    from app.api.stats import stats_service
+
+    async with init_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    def user(role, index):
+        return {
+            "id": new_id(), "first_name": "Bench", "last_name": f"{role}{index}",
+            "email": f"assign-{role}-{index}-{uuid.uuid4().hex[:8]}@example.com",
+            "hashed_password": "x", "role": role, "is_activated": True,
+        }
+
+    customer = user("customer", 0)
+    agents = [user("agent", index) for index in range(args.agents)]
+    tickets = [
+        {"id": new_id(), "title": f"Ticket {index}", "description": "Queue",
+         "customer_id": customer["id"], "embed_token": new_token()}
+        for index in range(args.tickets)
+    ]
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(User), [customer] + agents)
+        for start in range(0, len(tickets), 1000):
+            await session.execute(insert(Ticket), tickets[start:start + 1000])
+        await session.commit()
+    async with AsyncSessionLocal() as session:
+        # Rows were inserted behind TicketService's back, so rebuild the counters
+        await stats_service.reconcile(session)
+    return {"agents": [agent["id"] for agent in agents], "tickets": [ticket["id"] for ticket in tickets]}
+
+
+def bench_heap(agents: int, operations: int) -> Dict[str, float]:
+    from app.api.assignment import AgentLoadBalancer
+
+    balancer = AgentLoadBalancer()
+    balancer.set_loads({f"agent{index}": random.randrange(50) for index in range(agents)})
+    start = time.perf_counter()
+    for _ in range(operations):
+        balancer.release(balancer.reserve())
+    elapsed = time.perf_counter() - start
+    return {"ops": operations, "ops_per_second": round(operations / elapsed)}
+
+
+async def assigned_counts():
+    from sqlalchemy import func, select
+    from app.models.ticket import AsyncSessionLocal, Ticket
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Ticket.agent_id, func.count()).where(Ticket.agent_id.is_not(None)).group_by(Ticket.agent_id)
+        )
+        return dict(result.all())
+
+
+async def reset_assignments():
+    from sqlalchemy import update
+    from app.models.ticket import AsyncSessionLocal, Ticket, TicketStatus
+    from app.api.assignment import load_balancer
+    from app.api.stats import stats_service
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(update(Ticket).values(agent_id=None, status=TicketStatus.OPEN))
+        await session.commit()
+    async with AsyncSessionLocal() as session:
+        await stats_service.reconcile(session)
+    load_balancer._loaded_at = None
+
+
+async def bench_queue(args) -> Dict[str, float]:
+    from app.models.ticket import AsyncSessionLocal
+    from app.api.ticket import ticket_service
+
+    claimed = []
+    empty_polls = [0]
+
+    async def assigner():
+        while True:
+            async with AsyncSessionLocal() as session:
+                tickets = await ticket_service.auto_assign_queue(session, args.batch)
+            if not tickets:
+                empty_polls[0] += 1
+                # Another assigner may still hold rows; stop once a retry also finds nothing
+                if empty_polls[0] > args.assigners * 2:
+                    return
+                await asyncio.sleep(0)
+                continue
+            claimed.extend(ticket.id for ticket in tickets)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(assigner() for _ in range(args.assigners)))
+    elapsed = time.perf_counter() - start
+    return await summarize(claimed, elapsed)
+
+
+async def bench_single(args, ticket_ids) -> Dict[str, float]:
+    from app.models.ticket import AsyncSessionLocal
+    from app.api.ticket import ticket_service
+
+    # A small hot set so assigners keep colliding on the same tickets
+    hot = random.sample(ticket_ids, min(len(ticket_ids), args.requests // 2 or 1))
+    claimed = []
+    lost = [0]
+    semaphore = asyncio.Semaphore(args.assigners)
+
+    async def one():
+        async with semaphore:
+            async with AsyncSessionLocal() as session:
+                ticket = await ticket_service.auto_assign_ticket(session, random.choice(hot))
+            if ticket is None:
+                lost[0] += 1
+            else:
+                claimed.append(ticket.id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - start
+    return dict(await summarize(claimed, elapsed), lost_races=lost[0])
+
+
+async def bench_claim(args, agent_ids) -> Dict[str, float]:
+    from app.models.ticket import AsyncSessionLocal
+    from app.api.ticket import ticket_service
+
+    claimed = []
+
+    async def agent(agent_id):
+        while True:
+            async with AsyncSessionLocal() as session:
+                ticket = await ticket_service.claim_next_ticket(session, agent_id)
+            if ticket is None:
+                return
+            claimed.append(ticket.id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(agent(agent_id) for agent_id in agent_ids))
+    elapsed = time.perf_counter() - start
+    return await summarize(claimed, elapsed)
+
+
+async def summarize(claimed, elapsed) -> Dict[str, float]:
+    counts = await assigned_counts()
+    loads = list(counts.values()) or [0]
+    return {
+        "assigned": len(claimed),
+        "duplicates": len(claimed) - len(set(claimed)),
+        "assignments_per_second": round(len(claimed) / elapsed, 1) if elapsed else 0.0,
+        "agent_load_min": min(loads),
+        "agent_load_max": max(loads),
+    }
+
+
+async def run(args):
+    from app.models.ticket import dispose_engine
+
+    try:
+        seeded = await seed(args)
+        if "heap" in args.modes:
+            print("heap  ", bench_heap(args.agents, args.heap_operations), flush=True)
+        if "queue" in args.modes:
+            print("queue ", await bench_queue(args), flush=True)
+        if "single" in args.modes:
+            await reset_assignments()
+            print("single", await bench_single(args, seeded["tickets"]), flush=True)
+        if "claim" in args.modes:
+            await reset_assignments()
+            print("claim ", await bench_claim(args, seeded["agents"]), flush=True)
+    finally:
+        await dispose_engine()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Database to benchmark against (default: temporary SQLite file); "
+                        "its tables are dropped and reseeded")
+    parser.add_argument("--destroy-data", action="store_true", help="Confirm that --database-url may be wiped")
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--tickets", type=int, default=5000)
+    parser.add_argument("--assigners", type=int, default=20, help="Concurrent assigners")
+    parser.add_argument("--batch", type=int, default=10, help="Tickets per auto_assign_queue call")
+    parser.add_argument("--requests", type=int, default=1000, help="Single-ticket auto-assign attempts")
+    parser.add_argument("--heap-operations", type=int, default=200000)
+    parser.add_argument("--modes", nargs="*", default=["heap", "queue", "single", "claim"],
+                        choices=["heap", "queue", "single", "claim"])
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args(argv)
+    if args.database_url and not args.destroy_data:
+        parser.error("seeding drops every table in --database-url; pass --destroy-data to confirm")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    random.seed(args.seed)
+    workdir = tempfile.mkdtemp(prefix="assign-bench-")
+    # Settings are read at import time, so configure the environment before importing the app
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault("DB_ECHO", "false")
+    # Lock waits are the point of this benchmark; keep them out of the slow query log
+    os.environ.setdefault("SLOW_QUERY_MS", "10000")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""JWT signing and verification throughput.
+
+Verifies a pool of --tokens distinct access tokens in random order, the way
+repeat requests from many logged-in users arrive, and reports tokens per
+second for:
+
+  baseline          python-jose decode on every call (the previous verify_token)
+  <backend>         TokenVerifier with its cache disabled
+  <backend>+cache   TokenVerifier with the verified-token cache
+
+for python-jose and, when installed, PyJWT. Signing throughput is reported
+per backend too.
+
+    python -m benchmarks.jwt_bench
+    python -m benchmarks.jwt_bench --tokens 10000 --operations 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+SECRET = "bench-secret"
+
+
+def rate(func: Callable[[], object], operations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(operations):
+        func()
+    return operations / (time.perf_counter() - start)
+
+
+def claims(index: int) -> Dict[str, object]:
+    return {"email": f"user{index}@example.com", "id": str(index), "exp": int(time.time()) + 3600}
+
+
+def bench(args) -> List[Dict[str, object]]:
+    from jose import jwt as jose_jwt
+    from app.security.tokens import JoseBackend, PyJWTBackend, TokenVerifier
+
+    backends = [JoseBackend()]
+    try:
+        backends.append(PyJWTBackend())
+    except ImportError:
+        print("PyJWT not installed; pip install pyjwt to compare it", file=sys.stderr)
+
+    results = []
+    tokens = [jose_jwt.encode(claims(index), SECRET, algorithm="HS256") for index in range(args.tokens)]
+    order = [random.choice(tokens) for _ in range(args.operations)]
+    pending = iter(order)
+    ops = rate(lambda: jose_jwt.decode(next(pending), SECRET, algorithms=["HS256"]), len(order))
+    results.append({"case": "baseline", "verify_per_second": round(ops)})
+
+    for backend in backends:
+        for cache_size in (0, args.tokens):
+            verifier = TokenVerifier({"k1": SECRET}, active_kid="k1", backend=backend, cache_size=cache_size)
+            signed = [verifier.sign(claims(index)) for index in range(args.tokens)]
+            pending = iter([random.choice(signed) for _ in range(args.operations)])
+            verify_ops = rate(lambda: verifier.verify(next(pending)), args.operations)
+            counter = iter(range(args.operations))
+            sign_ops = rate(lambda: verifier.sign(claims(next(counter))), min(args.operations, 20000))
+            results.append({
+                "case": backend.name + ("+cache" if cache_size else ""),
+                "verify_per_second": round(verify_ops),
+                "sign_per_second": round(sign_ops),
+            })
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=1000, help="Distinct tokens in the pool")
+    parser.add_argument("--operations", type=int, default=50000, help="Verifications per case")
+    parser.add_argument("--seed", type=int, default=1234)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    random.seed(args.seed)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    baseline = None
+    for result in bench(args):
+        baseline = baseline or result["verify_per_second"]
+        speedup = result["verify_per_second"] / baseline
+        print(f"{result['case']:<14} {result['verify_per_second']:>10}/s verify  x{speedup:<6.1f}"
+              + (f" {result['sign_per_second']:>8}/s sign" if "sign_per_second" in result else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
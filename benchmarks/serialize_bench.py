@@ -0,0 +1,156 @@
+"""Per-row cost of building a large ticket listing response.
+
+Seeds --tickets tickets in a throwaway SQLite database (or --database-url, whose
+tables are dropped and recreated, with --destroy-data) and renders one page of
+all of them, --repeat times, through:
+
+  orm     select(Ticket) -> ORM objects -> TicketResponse.model_validate ->
+          jsonable_encoder -> json.dumps (the previous listing path)
+  rows    select(columns) -> Row tuples -> serialize_ticket_row -> dumps
+          (orjson when installed)
+  slim    the rows path with fields=--fields, as a dashboard list view asks for
+
+Each path is timed end to end ("total", including the query) and for the
+serialization step alone, and reported in microseconds per ticket.
+
+    python -m benchmarks.serialize_bench
+    python -m benchmarks.serialize_bench --tickets 10000 --repeat 5
+    python -m benchmarks.serialize_bench --database-url postgresql+asyncpg://... --destroy-data
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+
+async def seed(args) -> None:
+    from sqlalchemy import insert
+    from app.models.ids import new_id, new_token
+    from app.models.ticket import AsyncSessionLocal, Base, Ticket, TicketStatus, User, init_engine
+
+    async with init_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    customer = {"id": new_id(), "first_name": "Bench", "last_name": "Customer", "email": "serialize@example.com",
+                "hashed_password": "x", "role": "customer"}
+    statuses = list(TicketStatus)
+    tickets = [
+        {"id": new_id(), "title": f"Ticket {index}", "description": "Printer on fire. " * (1 + index % 20),
+         "status": statuses[index % len(statuses)], "customer_id": customer["id"], "embed_token": new_token(),
+         "resolution_notes": "Replaced the toner" if index % 3 == 0 else None}
+        for index in range(args.tickets)
+    ]
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(User), [customer])
+        for start in range(0, len(tickets), 1000):
+            await session.execute(insert(Ticket), tickets[start:start + 1000])
+        await session.commit()
+
+
+def envelope(tickets: List) -> Dict:
+    return {"status": "success", "status_code": 200, "message": "Tickets retrieved successfully",
+            "tickets": tickets, "next_cursor": None}
+
+
+def orm_render(tickets) -> bytes:
+    from fastapi.encoders import jsonable_encoder
+    from app.schemas.ticket import TicketResponse
+
+    content = jsonable_encoder(envelope([TicketResponse.model_validate(ticket) for ticket in tickets]))
+    # What fastapi.responses.JSONResponse.render does
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def rows_render(rows, fields=None) -> bytes:
+    from app.api.ticket import ticket_projection
+    from app.utils.serialization import dumps
+
+    serialize = ticket_projection(fields).serialize
+    return dumps(envelope([serialize(row) for row in rows]))
+
+
+async def measure(repeat: int, fetch: Callable, render: Callable) -> Dict[str, float]:
+    from app.models.ticket import AsyncSessionLocal
+
+    totals, renders = [], []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as session:
+            items = await fetch(session)
+        fetched = time.perf_counter()
+        body = render(items)
+        done = time.perf_counter()
+        totals.append((done - start) / len(items))
+        renders.append((done - fetched) / len(items))
+        size = len(body)
+    return {
+        "total_us_per_row": round(statistics.median(totals) * 1e6, 2),
+        "serialize_us_per_row": round(statistics.median(renders) * 1e6, 2),
+        "bytes": size,
+    }
+
+
+async def run(args) -> None:
+    from app.api.ticket import TICKET_FIELDS, WITH_BODIES, ticket_service
+    from app.models.ticket import dispose_engine
+    from app.utils import serialization
+
+    try:
+        await seed(args)
+
+        async def fetch_orm(session):
+            query = ticket_service.listing_query(limit=args.tickets).options(WITH_BODIES)
+            return (await session.execute(query)).scalars().all()
+
+        async def fetch_rows(session):
+            return await ticket_service.get_ticket_rows(session, limit=args.tickets)
+
+        async def fetch_slim(session):
+            return await ticket_service.get_ticket_rows(session, limit=args.tickets, fields=slim_fields)
+
+        slim_fields = tuple(field for field in TICKET_FIELDS if field in args.fields.split(","))
+        orm = await measure(args.repeat, fetch_orm, orm_render)
+        rows = await measure(args.repeat, fetch_rows, rows_render)
+        slim = await measure(args.repeat, fetch_slim, lambda page: rows_render(page, slim_fields))
+        print(f"orm   {orm}")
+        print(f"rows  {rows}  ({'orjson' if serialization.orjson else 'json'})")
+        print(f"slim  {slim}  (fields={','.join(slim_fields)})")
+        print(f"speedup: total x{orm['total_us_per_row'] / rows['total_us_per_row']:.1f}, "
+              f"serialize x{orm['serialize_us_per_row'] / rows['serialize_us_per_row']:.1f}")
+    finally:
+        await dispose_engine()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Database to benchmark against (default: temporary SQLite file); "
+                        "its tables are dropped and reseeded")
+    parser.add_argument("--destroy-data", action="store_true", help="Confirm that --database-url may be wiped")
+    parser.add_argument("--tickets", type=int, default=10000, help="Tickets in the rendered page")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fields", default="id,title,status", help="Fields selected by the slim case")
+    args = parser.parse_args(argv)
+    if args.database_url and not args.destroy_data:
+        parser.error("seeding drops every table in --database-url; pass --destroy-data to confirm")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="serialize-bench-")
+    # Settings are read at import time, so configure the environment before importing the app
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault("DB_ECHO", "false")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
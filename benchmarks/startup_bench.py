@@ -0,0 +1,167 @@
+"""Cold-start cost of the API process.
+
+Each run starts a fresh interpreter against a throwaway SQLite database (or
+--database-url) and times, in milliseconds:
+
+  import_ms         import main (every controller, model and service module)
+  startup_ms        running the lifespan startup (engine, schema, workers)
+  first_request_ms  the first GET /health once started
+  process_ms        interpreter launch to exit, as seen from outside
+
+and reports the median over --runs. --importtime lists the modules that
+dominate `import main`, for finding the next thing to defer.
+
+    python -m benchmarks.startup_bench
+    python -m benchmarks.startup_bench --environment production --runs 20
+    python -m benchmarks.startup_bench --save benchmarks/baselines/startup_sqlite.json
+    python -m benchmarks.startup_bench --compare benchmarks/baselines/startup_sqlite.json
+
+--compare exits non-zero when a median regresses beyond --tolerance against
+the saved baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one JSON line of timings
+PROBE = """
+import time
+start = time.perf_counter()
+import asyncio, json
+import main
+imported = time.perf_counter()
+
+async def probe():
+    import httpx
+    async with main.app.router.lifespan_context(main.app):
+        started = time.perf_counter()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get("/health")
+            assert response.status_code == 200, response.text
+        return started, time.perf_counter()
+
+started, answered = asyncio.run(probe())
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (started - imported) * 1000,
+    "first_request_ms": (answered - started) * 1000,
+}))
+"""
+
+METRICS = ("import_ms", "startup_ms", "first_request_ms", "process_ms")
+
+
+def child_env(args, database_url: str) -> Dict[str, str]:
+    env = dict(os.environ, DATABASE_URL=database_url, ENVIRONMENT=args.environment, PYTHONPATH=ROOT)
+    env.setdefault("DB_ECHO", "false")
+    # Keep the background workers out of the measurement's way
+    env.setdefault("OUTBOX_WORKER_ENABLED", "false")
+    env.setdefault("TICKET_STATS_RECONCILE_INTERVAL_SECONDS", "0")
+    return env
+
+
+def run_once(args, workdir: str, index: int) -> Dict[str, float]:
+    database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(workdir, f'startup-{index}.db')}"
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=child_env(args, database_url),
+        capture_output=True, text=True,
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{completed.stderr}")
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    timings["process_ms"] = elapsed
+    return timings
+
+
+def import_profile(args, workdir: str, top: int) -> List[str]:
+    """Slowest modules by cumulative import time, from python -X importtime"""
+    database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(workdir, 'importtime.db')}"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], cwd=ROOT, env=child_env(args, database_url),
+        capture_output=True, text=True,
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            rows.append((int(cumulative), module.rstrip()))
+    rows.sort(reverse=True)
+    return [f"{cumulative / 1000:>8.1f}ms {module}" for cumulative, module in rows[:top]]
+
+
+def summarize(runs: List[Dict[str, float]]) -> Dict[str, float]:
+    return {metric: round(statistics.median(run[metric] for run in runs), 2) for metric in METRICS}
+
+
+def compare(report: Dict[str, object], baseline_path: str, tolerance: float) -> List[str]:
+    """List medians that regressed beyond tolerance"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["startup"]
+    return [
+        f"{metric}: {baseline[metric]}ms -> {report['startup'][metric]}ms"
+        for metric in METRICS
+        if baseline.get(metric) and report["startup"][metric] > baseline[metric] * (1 + tolerance)
+    ]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Database to start against (default: a new SQLite file per run)")
+    parser.add_argument("--environment", default="development", help="ENVIRONMENT for the started app")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--importtime", type=int, default=0, metavar="N", help="Also list the N slowest imports")
+    parser.add_argument("--save", help="Write the JSON report to this path")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression ratio")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="startup-bench-")
+    runs = [run_once(args, workdir, index) for index in range(args.runs)]
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "environment": args.environment,
+            "runs": args.runs,
+        },
+        "startup": summarize(runs),
+    }
+    for metric, value in report["startup"].items():
+        print(f"{metric:<17} {value:>9.2f}ms")
+    if args.importtime:
+        print("\nslowest imports (cumulative):")
+        for line in import_profile(args, workdir, args.importtime):
+            print(line)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        regressions = compare(report, args.compare, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
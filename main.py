@@ -1,22 +1,47 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 
-from app.models.ticket import engine, Base
+from app.models.ticket import Base, database_url, dispose_engine, init_engine
+from app.models.replicas import replica_router
+from app.api.events import event_bus
+from app.api.outbox import outbox_worker, webhook_handler
+from app.api.stats import stats_service
+from config import settings
+from app.security.hashing import password_hasher
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.middleware.metrics import PrometheusMiddleware
+from app.middleware.replicas import ReadYourWritesMiddleware
+from app.utils.metrics import mark_worker_dead
 from app.controller.auth import router as auth_router
 from app.controller.user import router as user_router
 from app.controller.public import router as public_router
 from app.controller.tickets import router as ticket_router
+from app.controller.embed import router as embed_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # init_async_db()
-    # Create database tables on startup
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    engine = init_engine()
+    # Production schemas are managed by Alembic; elsewhere create missing tables for convenience
+    if settings.db_create_all:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    await replica_router.start()
+    await event_bus.start(database_url)
+    if settings.outbox_worker_enabled:
+        await outbox_worker.start()
+    await stats_service.start()
     yield
     # Cleanup on shutdown
-    await engine.dispose()
+    await stats_service.stop()
+    await outbox_worker.stop()
+    if webhook_handler is not None:
+        await webhook_handler.close()
+    await event_bus.stop()
+    password_hasher.shutdown()
+    await replica_router.stop()
+    await dispose_engine()
+    mark_worker_dead()
 
 
 app = FastAPI(
@@ -26,8 +51,13 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(PrometheusMiddleware)
+
 # Include routers
 app.include_router(public_router)
 app.include_router(auth_router)
 app.include_router(user_router)
 app.include_router(ticket_router)
+app.include_router(embed_router)
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from collections import Counter
+from types import SimpleNamespace
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.api.assignment import AgentLoadBalancer, NoAgentsAvailable
+from app.api.ticket import TicketService
+from app.models.ticket import Base, TicketStatus, User
+from app.utils.cache import NullCacheBackend
+
+def test_reserve_picks_least_loaded_and_spreads_work():
+    balancer = AgentLoadBalancer()
+    balancer.set_loads({"a": 2, "b": 0, "c": 1})
+    picks = [balancer.reserve() for _ in range(4)]
+    assert picks == ["b", "b", "c", "a"]
+    assert balancer.loads == {"a": 3, "b": 2, "c": 2}
+    balancer.release(*picks)
+    assert balancer.loads == {"a": 2, "b": 0, "c": 1}
+
+def test_apply_follows_status_transitions():
+    balancer = AgentLoadBalancer()
+    balancer.set_loads({"a": 1, "b": 1})
+    balancer.apply(Counter({(TicketStatus.OPEN, "a"): -1, (TicketStatus.RESOLVED, "a"): 1}))
+    assert balancer.loads["a"] == 0
+    assert balancer.reserve() == "a"
+
+def test_reload_keeps_reservations():
+    balancer = AgentLoadBalancer()
+    balancer.set_loads({"a": 0})
+    balancer.reserve()
+    balancer.set_loads({"a": 0, "b": 0})
+    assert balancer.reserve() == "b"
+
+def test_no_agents():
+    with pytest.raises(NoAgentsAvailable):
+        AgentLoadBalancer().reserve()
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'claim.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        session.add(User(id="cust1", first_name="A", last_name="B", email="a@example.com", hashed_password="x"))
+        for index in range(3):
+            session.add(User(id=f"agent{index}", first_name="C", last_name="D", email=f"c{index}@example.com", hashed_password="x", role="agent"))
+        await session.commit()
+    yield factory
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_concurrent_claims_take_distinct_tickets(session_factory):
+    service = TicketService(cache=NullCacheBackend())
+    async with session_factory() as db:
+        for title in ("First", "Second"):
+            await service.create_ticket(db, SimpleNamespace(model_dump=lambda title=title: {"title": title, "description": "D"}), "cust1")
+
+    async def claim(agent_id):
+        async with session_factory() as db:
+            return await service.claim_next_ticket(db, agent_id)
+
+    claimed = await asyncio.gather(*(claim(f"agent{index}") for index in range(3)))
+    tickets = [ticket for ticket in claimed if ticket is not None]
+    assert len(tickets) == 2 and len({ticket.id for ticket in tickets}) == 2
+    assert all(ticket.status == TicketStatus.IN_PROGRESS for ticket in tickets)
+    assert {ticket.agent_id for ticket in tickets} < {"agent0", "agent1", "agent2"}
+
+@pytest.mark.asyncio
+async def test_auto_assign_leaves_closed_tickets_alone(session_factory, monkeypatch):
+    monkeypatch.setattr("app.api.ticket.load_balancer", AgentLoadBalancer())
+    service = TicketService(cache=NullCacheBackend())
+    async with session_factory() as db:
+        ticket = await service.create_ticket(db, SimpleNamespace(model_dump=lambda: {"title": "T", "description": "D"}), "cust1")
+        await service.update_ticket(db, ticket.id, SimpleNamespace(model_dump=lambda exclude_unset: {"status": TicketStatus.RESOLVED}))
+
+    async with session_factory() as db:
+        assert await service.auto_assign_ticket(db, ticket.id) is None
+        unchanged = await service.get_ticket(db, ticket.id)
+    assert unchanged.agent_id is None and unchanged.status == TicketStatus.RESOLVED
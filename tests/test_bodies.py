@@ -0,0 +1,78 @@
+import json
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.api import ticket as ticket_module
+from app.api.bodies import DatabaseBodyStore, FileBodyStore, TicketBodyService, body_digest, build_body_store, decode_body, encode_body, preview
+from app.api.ticket import TicketService
+from app.models.ticket import Base, Ticket, TicketBlob, User
+from app.schemas.ticket import TicketCreate, TicketUpdate
+from app.utils.cache import NullCacheBackend
+
+LOG = "Traceback (most recent call last):\n  File \"app.py\", line 1\nKeyError: 'é'\n" * 50
+
+def test_encoding_round_trip():
+    packed = encode_body(LOG)
+    assert packed[:1] == b"z" and len(packed) < len(LOG.encode())
+    assert decode_body(packed) == LOG
+    assert encode_body("short", compress=False) == b"rshort"
+    assert decode_body(encode_body("é")) == "é"
+
+def test_preview_keeps_whole_characters():
+    assert preview("aé", 2) == "a"
+    assert preview("aé", 3) == "aé"
+
+def test_build_body_store(tmp_path):
+    assert isinstance(build_body_store("database"), DatabaseBodyStore)
+    assert build_body_store(f"file://{tmp_path}").root == str(tmp_path)
+    with pytest.raises(ValueError):
+        build_body_store("s3://bucket")
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'bodies.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        session.add(User(id="cust1", first_name="A", last_name="B", email="a@example.com", hashed_password="x"))
+        await session.commit()
+    yield factory
+    await engine.dispose()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("store", ["database", "file"])
+async def test_large_bodies_are_offloaded_and_read_back_on_detail(session_factory, tmp_path, monkeypatch, store):
+    bodies = TicketBodyService(
+        store=FileBodyStore(str(tmp_path / "blobs")) if store == "file" else DatabaseBodyStore(), inline_max_bytes=100
+    )
+    monkeypatch.setattr(ticket_module, "body_service", bodies)
+    service = TicketService(cache=NullCacheBackend())
+    async with session_factory() as db:
+        created = await service.create_ticket(db, TicketCreate(title="Crash", description=LOG), "cust1")
+        assert created.description == preview(LOG, 100) and created.description_blob == body_digest(LOG)
+        await service.update_ticket(db, created.id, TicketUpdate(resolution_notes="Fixed"))
+
+    async with session_factory() as db:
+        row = (await service.get_ticket_rows(db, fields=("description",)))[0]
+        assert row.description == preview(LOG, 100)
+        detail = json.loads(await service.get_ticket_payload(db, created.id))
+        assert detail["description"] == LOG and detail["resolution_notes"] == "Fixed"
+        blobs = (await db.execute(select(TicketBlob.digest))).scalars().all()
+        assert blobs == ([body_digest(LOG)] if store == "database" else [])
+
+@pytest.mark.asyncio
+async def test_bodies_are_deferred_by_default(session_factory):
+    service = TicketService(cache=NullCacheBackend())
+    async with session_factory() as db:
+        created = await service.create_ticket(db, TicketCreate(title="Crash", description="Short"), "cust1")
+        assert created.description == "Short" and created.description_blob is None
+
+    async with session_factory() as db:
+        ticket = (await db.execute(select(Ticket))).scalar_one()
+        with pytest.raises(InvalidRequestError):
+            ticket.description
+        assert (await service.get_ticket(db, created.id)).description == "Short"
@@ -0,0 +1,22 @@
+from config import Settings
+from app.models import pool
+from app.models.pool import InstrumentedQueuePool, engine_options
+
+def test_environment_defaults_do_not_override_explicit_settings():
+    production = Settings(environment="production")
+    assert production.db_pool_size == 10
+    assert production.db_statement_timeout_ms == 30000
+    assert production.db_echo is False
+    assert production.db_create_all is False and Settings().db_create_all is True
+    assert Settings(environment="production", db_pool_size=3).db_pool_size == 3
+
+def test_postgres_engine_options(monkeypatch):
+    monkeypatch.setattr(pool, "settings", Settings(db_pool_size=7, db_statement_timeout_ms=5000))
+    options = engine_options("postgresql+asyncpg://u:p@localhost/db")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 7
+    assert options["echo"] is False
+    assert options["connect_args"]["server_settings"] == {"statement_timeout": "5000"}
+
+def test_sqlite_engine_options_skip_pool_sizing():
+    assert engine_options("sqlite+aiosqlite:///tickets.db") == {"echo": False}
@@ -0,0 +1,71 @@
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from app.api.events import NOTIFY_PAYLOAD_LIMIT, EventBus, PostgresNotifyBridge, event_bus, ticket_event
+from app.api.ticket import TicketService
+from app.models.ticket import TicketStatus
+from app.utils.cache import NullCacheBackend
+
+def make_ticket(**overrides):
+    values = dict(id="ticket123", title="Printer", status=TicketStatus.OPEN, customer_id="cust1",
+                  agent_id=None, embed_token="token", created_at=datetime(2025, 1, 1), updated_at=None)
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+def test_ticket_event_is_json_ready():
+    event = ticket_event("created", make_ticket())
+    assert event["type"] == "ticket.created"
+    assert event["ticket"]["status"] == "Open"
+    assert event["ticket"]["created_at"] == "2025-01-01T00:00:00"
+
+@pytest.mark.asyncio
+async def test_subscribers_receive_matching_events_only():
+    bus = EventBus()
+    with bus.subscribe(agent_id="agent1") as mine, bus.subscribe(status="Resolved") as resolved:
+        await bus.publish(ticket_event("assigned", make_ticket(agent_id="agent1")))
+        await bus.publish(ticket_event("updated", make_ticket(status=TicketStatus.RESOLVED)))
+        assert (await mine.get(timeout=0.1))["type"] == "ticket.assigned"
+        assert await mine.get(timeout=0.01) is None
+        assert (await resolved.get(timeout=0.1))["ticket"]["status"] == "Resolved"
+    assert not bus.subscribers
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_drops_oldest():
+    bus = EventBus(max_queue=2)
+    subscription = bus.subscribe()
+    for index in range(3):
+        bus.deliver(ticket_event("updated", make_ticket(id=str(index))))
+    assert subscription.dropped == 1
+    assert (await subscription.get(timeout=0.1))["ticket"]["id"] == "1"
+
+@pytest.mark.asyncio
+async def test_batch_is_sent_in_few_notifies():
+    bus = EventBus()
+    bus.bridge = PostgresNotifyBridge(bus, "postgresql://localhost/tickets", "ticket_events")
+    payloads = []
+    async def notify(payload):
+        # Loop back as the listener would
+        payloads.append(payload)
+        bus.bridge._on_notify(None, 0, "ticket_events", payload)
+        return True
+    bus.bridge.notify = notify
+    events = [ticket_event("created", make_ticket(id=str(index))) for index in range(100)]
+    with bus.subscribe() as subscription:
+        await bus.publish_many(events)
+        assert [(await subscription.get(timeout=0.1))["ticket"]["id"] for _ in events] == [str(i) for i in range(100)]
+    assert 1 < len(payloads) < 10
+    assert all(len(payload) <= NOTIFY_PAYLOAD_LIMIT for payload in payloads)
+
+@pytest.mark.asyncio
+async def test_assign_publishes_after_commit():
+    service = TicketService(cache=NullCacheBackend())
+    db = AsyncMock()
+    db.add_all = MagicMock()
+    result = MagicMock()
+    result.all.return_value = [(make_ticket(agent_id="agent1"), TicketStatus.OPEN, None)]
+    db.execute = AsyncMock(return_value=result)
+    with event_bus.subscribe(agent_id="agent1") as subscription:
+        await service.assign_ticket(db, "ticket123", "agent1")
+        db.commit.assert_awaited_once()
+        assert (await subscription.get(timeout=0.1))["type"] == "ticket.assigned"
@@ -0,0 +1,42 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from fastapi import HTTPException
+from app.controller import user as user_controller
+from app.schemas.ticket import UserUpdate
+from app.security.hashing import PasswordHasher, HashingPoolSaturated
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_roundtrip():
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+    hashed = await hasher.hash("password123")
+    assert await hasher.verify("password123", hashed)
+    assert not await hasher.verify("wrong-password", hashed)
+    metrics = hasher.metrics()
+    assert metrics["operations"]["hash"]["count"] == 1
+    assert metrics["operations"]["verify"]["count"] == 2
+    hasher.shutdown()
+
+@pytest.mark.asyncio
+async def test_saturated_pool_rejects_work():
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+    running = [
+        asyncio.create_task(hasher._run("hash", time.sleep, 0.2)),
+        asyncio.create_task(hasher._run("hash", time.sleep, 0.2)),
+    ]
+    await asyncio.sleep(0)
+    assert hasher.queue_depth == 1
+    with pytest.raises(HashingPoolSaturated):
+        await hasher._run("hash", time.sleep, 0.2)
+    await asyncio.gather(*running)
+    assert hasher.in_flight == 0
+    assert hasher.metrics()["operations"]["hash"]["rejected"] == 1
+    hasher.shutdown()
+
+@pytest.mark.asyncio
+async def test_profile_update_is_throttled_when_pool_is_saturated(monkeypatch):
+    monkeypatch.setattr(user_controller.user_service, "update_user", AsyncMock(side_effect=HashingPoolSaturated()))
+    with pytest.raises(HTTPException) as raised:
+        await user_controller.update_user_profile(UserUpdate(password="new-password"), MagicMock(id="u1"), AsyncMock())
+    assert raised.value.status_code == 429 and raised.value.headers == {"Retry-After": "1"}
@@ -0,0 +1,25 @@
+import time
+import uuid
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+from app.models.ids import GUID, NIL_UUID, uuid7
+from app.models.ticket import Ticket
+
+def test_uuid7_is_time_ordered():
+    ids = [uuid7() for _ in range(10000)]
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    assert all(value.version == 7 and value.variant == uuid.RFC_4122 for value in ids)
+    assert abs((ids[0].int >> 80) - time.time() * 1000) < 5000
+
+def test_guid_binds_native_uuid_on_postgres_only():
+    guid, pg = GUID(), postgresql.dialect()
+    value = str(uuid7())
+    assert guid.process_bind_param(value, pg) == uuid.UUID(value)
+    assert guid.process_bind_param("not-a-uuid", pg) == NIL_UUID
+    assert guid.process_result_value(uuid.UUID(value), pg) == value
+    assert guid.process_bind_param("agent1", sqlite.dialect()) == "agent1"
+
+def test_ticket_keys_are_native_uuid_on_postgres():
+    ddl = str(CreateTable(Ticket.__table__).compile(dialect=postgresql.dialect()))
+    for column in ("id", "customer_id", "agent_id", "embed_token"):
+        assert f"\t{column} UUID" in ddl
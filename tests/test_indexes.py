@@ -0,0 +1,51 @@
+import os
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.models.ticket import Base, TicketStatus
+from app.api.ticket import TicketService
+from app.api.pagination import encode_cursor
+
+service = TicketService()
+cursor = encode_cursor(datetime(2025, 1, 1), "ticket123")
+
+HOT_QUERIES = {
+    "agent_queue": service.listing_query(agent_id="agent123", limit=50),
+    "agent_queue_by_status": service.listing_query(status=TicketStatus.IN_PROGRESS, agent_id="agent123", cursor=cursor, limit=50),
+    "customer_tickets": service.listing_query(customer_id="user123", cursor=cursor, limit=50),
+    "open_queue": service.listing_query(status=TicketStatus.OPEN, limit=50),
+}
+
+def literal_sql(query, dialect):
+    return str(query.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_queries_use_an_index_on_sqlite(name):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + literal_sql(HOT_QUERIES[name], engine.dialect)).all()
+    details = [row[3] for row in plan]
+    assert not any(detail.startswith("SCAN tickets") and "INDEX" not in detail for detail in details), details
+    assert not any("TEMP B-TREE FOR ORDER BY" in detail for detail in details), details
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.environ.get("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+@pytest.mark.parametrize("name", HOT_QUERIES)
+async def test_hot_queries_avoid_seq_scan_on_postgres(name):
+    engine = create_async_engine(os.environ["TEST_POSTGRES_URL"])
+    async with engine.connect() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # Empty test tables favour seq scans, so make them the last resort
+        await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + literal_sql(HOT_QUERIES[name], engine.dialect))
+        plan = result.scalar()[0]["Plan"]
+        await conn.rollback()
+    await engine.dispose()
+    assert not any(node["Node Type"] == "Seq Scan" for node in _plan_nodes(plan))
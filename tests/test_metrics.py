@@ -0,0 +1,30 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+from app.middleware.metrics import PrometheusMiddleware
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template():
+    app = FastAPI()
+    app.add_middleware(PrometheusMiddleware)
+
+    @app.get("/widgets/{widget_id}")
+    async def get_widget(widget_id: str):
+        return {"id": widget_id}
+
+    labels = {"method": "GET", "route": "/widgets/{widget_id}", "status": "200"}
+    before = REGISTRY.get_sample_value("http_requests_total", labels) or 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.get("/widgets/1")
+        await client.get("/widgets/2")
+        await client.get("/nowhere")
+
+    assert REGISTRY.get_sample_value("http_requests_total", labels) == before + 2
+    assert REGISTRY.get_sample_value(
+        "http_requests_total", {"method": "GET", "route": "unmatched", "status": "404"}
+    ) >= 1
+    assert REGISTRY.get_sample_value(
+        "http_request_duration_seconds_count", {"method": "GET", "route": "/widgets/{widget_id}"}
+    ) >= 2
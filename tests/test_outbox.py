@@ -0,0 +1,96 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.api import ticket as ticket_module
+from app.api.outbox import ALL_EVENTS, LEASE_MARGIN_SECONDS, OutboxWorker, add_outbox_events
+from app.api.ticket import TicketService
+from app.models.ticket import Base, OutboxEvent, User
+from app.schemas.ticket import TicketCreate, TicketUpdate
+from app.utils.cache import NullCacheBackend
+
+def event(ticket_id, event_type="ticket.created"):
+    return {"type": event_type, "ticket": {"id": ticket_id}}
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'outbox.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+async def stage(session_factory, *events):
+    async with session_factory() as db:
+        add_outbox_events(db, events)
+        await db.commit()
+
+async def rows(session_factory):
+    async with session_factory() as db:
+        result = await db.execute(select(OutboxEvent).order_by(OutboxEvent.ticket_id))
+        return result.scalars().all()
+
+@pytest.mark.asyncio
+async def test_drain_delivers_and_marks_processed(session_factory):
+    worker = OutboxWorker(session_factory=session_factory)
+    seen = []
+
+    async def handler(payload):
+        seen.append(payload["ticket"]["id"])
+
+    worker.register("ticket.created", handler)
+    await stage(session_factory, event("a"), event("b"), event("c", "ticket.updated"))
+    assert await worker.drain_once() == 3
+    assert sorted(seen) == ["a", "b"]
+    assert all(row.processed_at is not None for row in await rows(session_factory))
+    assert await worker.drain_once() == 0
+
+@pytest.mark.asyncio
+async def test_failures_back_off_then_give_up(session_factory):
+    worker = OutboxWorker(session_factory=session_factory, max_attempts=2, backoff_seconds=0)
+
+    async def broken(payload):
+        raise RuntimeError("webhook down")
+
+    worker.register(ALL_EVENTS, broken)
+    await stage(session_factory, event("a"))
+    await worker.drain_once()
+    [row] = await rows(session_factory)
+    assert (row.attempts, row.processed_at, row.last_error) == (1, None, "RuntimeError: webhook down")
+    await worker.drain_once()
+    [row] = await rows(session_factory)
+    assert row.attempts == 2 and row.processed_at is not None
+    assert worker.stats == {"processed": 0, "retried": 1, "failed": 1}
+
+def test_backoff_is_exponential_and_capped():
+    worker = OutboxWorker(backoff_seconds=1, backoff_max_seconds=5)
+    assert [worker.backoff(attempt) for attempt in range(1, 5)] == [1, 2, 4, 5]
+
+@pytest.mark.asyncio
+async def test_ticket_writes_stage_events_only_when_handled(session_factory, monkeypatch):
+    worker = OutboxWorker(session_factory=session_factory)
+    monkeypatch.setattr(ticket_module, "outbox_worker", worker)
+    service = TicketService(cache=NullCacheBackend())
+    async with session_factory() as db:
+        db.add(User(id="cust1", first_name="A", last_name="B", email="a@example.com", hashed_password="x"))
+        await db.commit()
+        await service.create_ticket(db, TicketCreate(title="Printer", description="Jammed"), "cust1")
+        assert await rows(session_factory) == []
+
+        worker.register("ticket.updated", lambda payload: None)
+        created = await service.create_ticket(db, TicketCreate(title="Printer", description="Jammed"), "cust1")
+        assert await rows(session_factory) == []
+        await service.update_ticket(db, created.id, TicketUpdate(resolution_notes="Fixed"))
+        assert [row.event_type for row in await rows(session_factory)] == ["ticket.updated"]
+
+@pytest.mark.asyncio
+async def test_lease_outlasts_the_slowest_batch():
+    worker = OutboxWorker(batch_size=100, concurrency=10, handler_timeout=10)
+    assert worker.min_lease_seconds() == 10 * 10 + LEASE_MARGIN_SECONDS
+    worker.register(ALL_EVENTS, lambda payload: None)
+    worker.register("ticket.created", lambda payload: None)
+    assert worker.lease() == 10 * 2 * 10 + LEASE_MARGIN_SECONDS
+
+    with pytest.raises(ValueError):
+        await OutboxWorker(batch_size=100, concurrency=10, handler_timeout=10, lease_seconds=60).start()
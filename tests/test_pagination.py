@@ -0,0 +1,27 @@
+import pytest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from app.api.pagination import encode_cursor, decode_cursor, next_cursor, InvalidCursor
+from app.api.ticket import TicketService
+
+def test_cursor_roundtrip():
+    created_at = datetime(2025, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc)
+    cursor = encode_cursor(created_at, "ticket123")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, "ticket123")
+
+def test_invalid_cursor_rejected():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+def test_next_cursor_only_for_full_pages():
+    rows = [SimpleNamespace(created_at=datetime(2025, 1, 1), id=str(i)) for i in range(3)]
+    assert next_cursor(rows, 5) is None
+    assert decode_cursor(next_cursor(rows, 3))[1] == "2"
+
+def test_listing_query_orders_by_keyset():
+    cursor = encode_cursor(datetime(2025, 1, 1), "ticket123")
+    query = TicketService().listing_query(customer_id="user123", cursor=cursor, limit=10)
+    sql = str(query)
+    assert "(tickets.created_at, tickets.id) >" in sql
+    assert "ORDER BY tickets.created_at, tickets.id" in sql
@@ -0,0 +1,39 @@
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from app.security.auth import AuthService
+from app.utils.cache import TTLCache
+
+def make_user(email="jane@example.com"):
+    now = datetime.now()
+    return SimpleNamespace(
+        id="user123", first_name="Jane", last_name="Doe", email=email,
+        is_activated=True, last_login=None, role="agent", created_at=now, updated_at=now,
+    )
+
+def test_ttl_cache_expires_and_evicts():
+    now = [0.0]
+    cache = TTLCache(max_size=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None  # least recently used
+    now[0] = 11
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+@pytest.mark.asyncio
+async def test_get_principal_hits_database_once():
+    service = AuthService()
+    service.get_user_by_email = AsyncMock(return_value=make_user())
+    db = AsyncMock()
+    first = await service.get_principal(db, "jane@example.com")
+    second = await service.get_principal(db, "jane@example.com")
+    assert first.id == second.id == "user123"
+    service.get_user_by_email.assert_awaited_once()
+
+    service.invalidate_principal("jane@example.com")
+    await service.get_principal(db, "jane@example.com")
+    assert service.get_user_by_email.await_count == 2
@@ -0,0 +1,39 @@
+import logging
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.models.query_stats import instrument_engine
+
+@pytest.mark.asyncio
+async def test_query_stats_headers_and_slow_request_log(monkeypatch, caplog):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    instrument_engine(engine)
+    # Instrumenting again must not count each statement twice
+    instrument_engine(engine)
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    @app.get("/two-queries")
+    async def two_queries():
+        async with engine.connect() as conn:
+            await conn.execute(text("select 1"))
+            await conn.execute(text("select 2"))
+        return {"ok": True}
+
+    from app.middleware import query_stats
+    monkeypatch.setattr(query_stats.settings, "slow_request_db_ms", 0.0)
+    transport = httpx.ASGITransport(app=app)
+    with caplog.at_level(logging.WARNING, logger="app.middleware.query_stats"):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/two-queries")
+    await engine.dispose()
+
+    assert response.headers["X-DB-Query-Count"] == "2"
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert '"2 queries"' in response.headers["Server-Timing"]
+    record = next(r for r in caplog.records if r.name == "app.middleware.query_stats")
+    assert record.db_queries == 2
+    assert record.path == "/two-queries"
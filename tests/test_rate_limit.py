@@ -0,0 +1,17 @@
+from app.utils.rate_limit import RateLimiter
+
+def test_bucket_allows_burst_then_refills():
+    now = [0.0]
+    limiter = RateLimiter(rate=1, burst=2, clock=lambda: now[0])
+    assert limiter.acquire("t") == 0
+    assert limiter.acquire("t") == 0
+    assert limiter.acquire("t") == 1.0
+    assert limiter.acquire("other") == 0
+    now[0] = 1.0
+    assert limiter.acquire("t") == 0
+
+def test_bucket_count_is_bounded():
+    limiter = RateLimiter(rate=1, burst=1, max_keys=2)
+    for key in "abc":
+        limiter.acquire(key)
+    assert len(limiter._buckets) == 2
@@ -0,0 +1,147 @@
+import httpx
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import HTTPConnection
+from app.config import dependencies
+from app.middleware.replicas import ReadYourWritesMiddleware
+from app.models.replicas import PIN_COOKIE, PIN_HEADER, ReplicaRouter, is_connection_error
+
+def connection(headers=None):
+    headers = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return HTTPConnection({"type": "http", "method": "GET", "headers": headers})
+
+@pytest.fixture
+def clock():
+    now = [1000.0]
+    clock = lambda: now[0]
+    clock.advance = lambda seconds: now.__setitem__(0, now[0] + seconds)
+    return clock
+
+@pytest_asyncio.fixture
+async def router(tmp_path, clock):
+    router = ReplicaRouter(
+        [f"sqlite+aiosqlite:///{tmp_path / 'r1.db'}", f"sqlite+aiosqlite:///{tmp_path / 'r2.db'}"],
+        max_lag=5, sticky_seconds=10, check_interval=60, clock=clock, wall_clock=clock,
+    )
+    await router.start()
+    yield router
+    await router.stop()
+
+def test_without_replicas_reads_go_to_the_primary():
+    router = ReplicaRouter()
+    assert router.pick(connection()) is None and router.metrics() == []
+
+@pytest.mark.asyncio
+async def test_reads_spread_over_caught_up_replicas(router):
+    picks = {router.pick(connection()).name for _ in range(4)}
+    assert len(picks) == 2
+    assert all(replica["available"] and replica["lag_seconds"] == 0 for replica in router.metrics())
+
+@pytest.mark.asyncio
+async def test_pinned_clients_read_from_the_primary_for_the_sticky_window(router, clock):
+    pin = router.pin()
+    assert router.pick(connection({PIN_HEADER: pin})) is None
+    assert router.pick(connection({"Cookie": f"{PIN_COOKIE}={pin}"})) is None
+    assert router.pick(connection({PIN_HEADER: "garbage"})) is not None
+    clock.advance(11)
+    assert router.pick(connection({PIN_HEADER: pin})) is not None
+
+@pytest.mark.asyncio
+async def test_write_responses_carry_the_pin(router):
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, router=router)
+
+    @app.get("/tickets")
+    async def read():
+        return {}
+
+    @app.post("/tickets")
+    async def write():
+        return {}
+
+    @app.patch("/tickets")
+    async def failed_write():
+        raise HTTPException(status_code=404)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert PIN_HEADER not in (await client.get("/tickets")).headers
+        response = await client.post("/tickets")
+        assert response.headers[PIN_HEADER] == router.pin()
+        assert response.cookies[PIN_COOKIE] == router.pin()
+        assert "Max-Age=10" in response.headers["set-cookie"]
+        assert PIN_HEADER not in (await client.patch("/tickets")).headers
+
+@pytest.mark.asyncio
+async def test_lagging_and_failed_replicas_are_skipped(router, monkeypatch):
+    lagging, healthy = router.replicas
+    monkeypatch.setattr(router, "_measure_lag", AsyncMock(side_effect=lambda replica: 30.0 if replica is lagging else 0.0))
+    await router.check_all()
+    assert {router.pick().name for _ in range(4)} == {healthy.name}
+
+    router.mark_failed(healthy, ConnectionRefusedError("refused"))
+    assert router.pick() is None
+    assert [replica["last_error"] for replica in router.metrics()] == [None, "refused"]
+
+    # A successful check brings it straight back
+    await router.check(healthy)
+    assert router.pick() is healthy
+
+@pytest.mark.asyncio
+async def test_unreachable_replica_is_marked_down(tmp_path, clock):
+    router = ReplicaRouter([f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'r.db'}"], check_interval=60, clock=clock)
+    await router.start()
+    try:
+        assert router.pick() is None
+        assert router.metrics()[0]["last_error"]
+    finally:
+        await router.stop()
+
+@pytest.mark.asyncio
+async def test_read_session_fails_over_after_connection_error(router, monkeypatch):
+    monkeypatch.setattr(dependencies, "replica_router", router)
+    sessions = dependencies.get_read_db(connection(), db=None)
+    session = await sessions.__anext__()
+    assert session.info["replica"]
+    with pytest.raises(exc.OperationalError):
+        await sessions.athrow(exc.OperationalError("SELECT 1", {}, ConnectionResetError()))
+    failed = [replica for replica in router.replicas if replica.name == session.info["replica"]]
+    assert router.pick() is not failed[0] and router.pick() is not failed[0]
+
+@pytest.mark.asyncio
+async def test_streamed_reads_mark_failed_replicas_and_fall_back_to_the_primary(router, tmp_path, monkeypatch):
+    monkeypatch.setattr(dependencies, "replica_router", router)
+    healthy, unreachable = router.replicas
+    monkeypatch.setattr(router, "pick", lambda connection=None: healthy)
+    with pytest.raises(exc.OperationalError):
+        async with dependencies.read_sessions(connection())() as session:
+            assert session.info["replica"] == healthy.name
+            raise exc.OperationalError("SELECT 1", {}, ConnectionResetError())
+    assert healthy.last_error
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'r.db'}")
+    monkeypatch.setattr(unreachable, "sessions", sessionmaker(bind=engine, class_=AsyncSession, info={"replica": unreachable.name}))
+    monkeypatch.setattr(router, "pick", lambda connection=None: unreachable)
+    try:
+        async with dependencies.read_sessions(connection())() as session:
+            assert "replica" not in session.info
+    finally:
+        await engine.dispose()
+    assert unreachable.last_error
+
+@pytest.mark.asyncio
+async def test_primary_reads_share_the_request_session(monkeypatch):
+    monkeypatch.setattr(dependencies, "replica_router", ReplicaRouter())
+    primary = object()
+    assert await dependencies.get_read_db(connection(), db=primary).__anext__() is primary
+
+def test_is_connection_error():
+    assert is_connection_error(ConnectionRefusedError())
+    assert is_connection_error(exc.InterfaceError("SELECT 1", {}, Exception()))
+    assert not is_connection_error(exc.IntegrityError("INSERT", {}, Exception()))
+    assert not is_connection_error(ValueError())
@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+from app.api.search import InvertedIndex, prefix_tsquery, tokenize
+
+def ticket(id, title, description="", resolution_notes=None, customer_id="cust1"):
+    return SimpleNamespace(id=id, title=title, description=description,
+                           resolution_notes=resolution_notes, customer_id=customer_id)
+
+def build(*tickets):
+    index = InvertedIndex()
+    for t in tickets:
+        index.add(t)
+    return index
+
+def test_tokenize_and_tsquery():
+    assert tokenize("Printer's on FIRE!") == ["printer", "s", "on", "fire"]
+    assert prefix_tsquery(["print", "jam"]) == "print:* & jam:*"
+
+def test_prefix_match_ranks_title_above_description():
+    index = build(
+        ticket("a", "Login broken", "The printer works"),
+        ticket("b", "Printer jammed", "Paper stuck"),
+        ticket("c", "Slow email"),
+    )
+    assert [tid for tid, _ in index.search(["print"])] == ["b", "a"]
+
+def test_all_terms_required():
+    index = build(ticket("a", "Printer jammed"), ticket("b", "Printer on fire"))
+    assert [tid for tid, _ in index.search(["print", "fire"])] == ["b"]
+    assert index.search(["print", "nothing"]) == []
+
+def test_customer_filter_and_reindex():
+    index = build(ticket("a", "Printer", customer_id="c1"), ticket("b", "Printer", customer_id="c2"))
+    assert [tid for tid, _ in index.search(["printer"], customer_id="c2")] == ["b"]
+    index.add(ticket("b", "Scanner", customer_id="c2"))
+    assert [tid for tid, _ in index.search(["printer"])] == ["a"]
+    assert index.search(["scan"])[0][0] == "b"
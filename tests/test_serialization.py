@@ -0,0 +1,34 @@
+import pytest
+from datetime import datetime, timezone
+from app.api.fields import InvalidFields, parse_fields
+from app.api.ticket import TICKET_FIELDS, serialize_ticket_row, ticket_projection
+from app.models.ticket import TicketStatus
+from app.schemas.ticket import TicketResponse
+from app.utils import serialization
+
+ROW = (
+    "Printer on fire", "It is still burning", "0191f0e0-0000-7000-8000-000000000001", TicketStatus.IN_PROGRESS,
+    datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc), datetime(2026, 1, 2, 3, 4, 6),
+    "cust1", None, None, "0191f0e0-0000-4000-8000-000000000002",
+)
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_row_path_matches_pydantic_output(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson not installed")
+    expected = TicketResponse.model_validate(dict(zip(TICKET_FIELDS, ROW))).model_dump_json()
+    assert serialization.dumps(serialize_ticket_row(ROW)) == expected.encode()
+
+def test_parse_fields_keeps_schema_order_and_rejects_unknown():
+    assert parse_fields("status, id,title,id", TicketResponse) == ("title", "id", "status")
+    assert parse_fields("", TicketResponse) is None
+    with pytest.raises(InvalidFields):
+        parse_fields("title,password", TicketResponse)
+
+def test_projection_selects_cursor_columns_but_only_serializes_requested_fields():
+    slim = ticket_projection(("title", "status"))
+    assert [column.key for column in slim.columns] == ["title", "status", "created_at", "id"]
+    assert slim.serialize(("T", TicketStatus.OPEN, ROW[4], ROW[2])) == {"title": "T", "status": TicketStatus.OPEN}
+    assert ticket_projection(("title", "status")) is slim
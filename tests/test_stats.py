@@ -0,0 +1,72 @@
+import pytest
+import pytest_asyncio
+from collections import Counter
+from types import SimpleNamespace
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.api.stats import TicketStatsService, created_deltas, transition_deltas
+from app.api.ticket import TicketService
+from app.models.ticket import Base, Ticket, TicketStatus, User
+from app.utils.cache import NullCacheBackend
+
+OPEN, RESOLVED = TicketStatus.OPEN, TicketStatus.RESOLVED
+
+def ticket(status, agent_id=None):
+    return SimpleNamespace(status=status, agent_id=agent_id)
+
+def test_deltas():
+    assert created_deltas([ticket(OPEN), ticket(OPEN)]) == Counter({(OPEN, ""): 2})
+    changes = [(ticket(RESOLVED, "a1"), OPEN, "a1"), (ticket(OPEN), OPEN, None)]
+    assert transition_deltas(changes) == Counter({(OPEN, "a1"): -1, (RESOLVED, "a1"): 1})
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        session.add(User(id="cust1", first_name="A", last_name="B", email="a@example.com", hashed_password="x"))
+        session.add(User(id="agent1", first_name="C", last_name="D", email="c@example.com", hashed_password="x", role="agent"))
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_counters_follow_ticket_writes(db):
+    service = TicketService(cache=NullCacheBackend())
+    stats = TicketStatsService(shards=4)
+    created = await service.create_ticket(db, SimpleNamespace(model_dump=lambda: {"title": "T", "description": "D"}), "cust1")
+    await service.create_ticket(db, SimpleNamespace(model_dump=lambda: {"title": "U", "description": "D"}), "cust1")
+    await service.assign_ticket(db, created.id, "agent1")
+    await service.bulk_update_tickets(db, {created.id: {"status": "Resolved"}})
+
+    result = await stats.get_stats(db)
+    assert result["total"] == 2
+    assert result["by_status"]["Open"] == 1 and result["by_status"]["Resolved"] == 1
+    assert result["by_agent"] == {"agent1": {"Resolved": 1}}
+    assert await stats.reconcile(db) == []
+
+@pytest.mark.asyncio
+async def test_reconcile_repairs_drift(db):
+    stats = TicketStatsService()
+    db.add(Ticket(title="T", description="D", customer_id="cust1"))
+    await db.commit()
+    mismatches = await stats.reconcile(db)
+    assert mismatches == [{"status": "Open", "agent_id": None, "expected": 1, "counted": 0}]
+    assert (await stats.get_stats(db))["by_status"]["Open"] == 1
+    assert await stats.reconcile(db) == []
+
+@pytest.mark.asyncio
+async def test_one_statement_updates_return_each_rows_previous_values(db):
+    service = TicketService(cache=NullCacheBackend())
+    tickets = [
+        await service.create_ticket(db, SimpleNamespace(model_dump=lambda: {"title": str(index), "description": "D"}), "cust1")
+        for index in range(3)
+    ]
+    await service.assign_ticket(db, tickets[1].id, "agent1")
+    changes = await service._update_tracked(db, {"status": RESOLVED, "agent_id": "agent2"}, Ticket.customer_id == "cust1")
+    assert sorted((ticket.title, ticket.status, ticket.agent_id, status, agent) for ticket, status, agent in changes) == [
+        ("0", RESOLVED, "agent2", OPEN, None),
+        ("1", RESOLVED, "agent2", OPEN, "agent1"),
+        ("2", RESOLVED, "agent2", OPEN, None),
+    ]
@@ -0,0 +1,78 @@
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from app.api.ticket import TicketService
+from app.controller.tickets import etag_matches
+from app.models.ticket import TicketStatus
+from app.schemas.ticket import TicketUpdate
+from app.utils.cache import MemoryCacheBackend, NullCacheBackend, build_cache_backend, payload_etag
+
+def make_ticket(**overrides):
+    now = datetime(2025, 1, 1)
+    values = dict(
+        id="ticket123", title="Printer", description="On fire", status=TicketStatus.OPEN, customer_id="user123",
+        agent_id=None, resolution_notes=None, embed_token="token", created_at=now, updated_at=now,
+        description_blob=None, resolution_notes_blob=None,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+@pytest.mark.asyncio
+async def test_ticket_payload_is_read_through():
+    service = TicketService(cache=MemoryCacheBackend())
+    service.get_ticket = AsyncMock(return_value=make_ticket())
+    first = await service.get_ticket_payload(AsyncMock(), "ticket123")
+    second = await service.get_ticket_payload(AsyncMock(), "ticket123")
+    assert first == second and b'"title":"Printer"' in first
+    service.get_ticket.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_update_invalidates_cached_payload():
+    service = TicketService(cache=MemoryCacheBackend())
+    service.get_ticket = AsyncMock(return_value=make_ticket())
+    before = await service.get_ticket_payload(AsyncMock(), "ticket123")
+
+    db = AsyncMock()
+    db.add_all = MagicMock()
+    result = MagicMock()
+    result.all.return_value = [(make_ticket(resolution_notes="Done"), TicketStatus.OPEN, None)]
+    db.execute = AsyncMock(return_value=result)
+    await service.update_ticket(db, "ticket123", TicketUpdate(resolution_notes="Done"))
+
+    service.get_ticket.return_value = make_ticket(resolution_notes="Done")
+    after = await service.get_ticket_payload(AsyncMock(), "ticket123")
+    assert payload_etag(after) != payload_etag(before)
+
+def test_etag_matching():
+    etag = payload_etag(b"{}")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+def test_build_cache_backend():
+    assert isinstance(build_cache_backend("memory", 10, 30), MemoryCacheBackend)
+    assert isinstance(build_cache_backend("none", 10, 30), NullCacheBackend)
+    assert isinstance(build_cache_backend("memory", 10, 0), NullCacheBackend)
+    with pytest.raises(ValueError):
+        build_cache_backend("memcached://localhost", 10, 30)
+
+@pytest.mark.asyncio
+async def test_embed_payload_caches_misses_and_is_invalidated():
+    service = TicketService(cache=MemoryCacheBackend())
+    db = AsyncMock()
+    result = MagicMock()
+    result.one_or_none.return_value = None
+    db.execute = AsyncMock(return_value=result)
+    assert await service.get_embed_payload(db, "token") is None
+    assert await service.get_embed_payload(db, "token") is None
+    db.execute.assert_awaited_once()
+    # Misses stay out of the shared payload cache
+    assert await service.cache.get("embed:token") is None
+
+    await service._after_write([make_ticket()], "updated")
+    result.one_or_none.return_value = make_ticket()
+    payload = await service.get_embed_payload(db, "token")
+    assert b'"status":"Open"' in payload and b"customer_id" not in payload
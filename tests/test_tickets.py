@@ -2,7 +2,9 @@ import pytest
 import asyncio
 from unittest.mock import AsyncMock, MagicMock
 from app.api.ticket import TicketService
-from app.schemas.ticket import TicketCreate, TicketUpdate
+from app.models.ticket import TicketStatus
+from pydantic import ValidationError
+from app.schemas.ticket import TicketBulkUpdateItem, TicketCreate, TicketUpdate
 
 @pytest.mark.asyncio
 async def test_create_ticket():
@@ -30,33 +32,90 @@ async def test_create_ticket():
     assert result.customer_id == "user123"
     assert result.title == "Test"
 
-@pytest.mark.asyncio
-async def test_get_ticket_by_customer():
-    db = AsyncMock()
-    service = TicketService()
-    service.get_ticket_by_customer = AsyncMock(return_value=[MagicMock()])
-    result = await service.get_ticket_by_customer(db, "user123")
-    assert isinstance(result, list)
+def returning_result(row, previous_status=TicketStatus.OPEN, previous_agent=None):
+    result = MagicMock()
+    result.all.return_value = [(row, previous_status, previous_agent)] if row is not None else []
+    return result
+
+def executed_sql(db):
+    return [str(call.args[0]) for call in db.execute.await_args_list]
 
 @pytest.mark.asyncio
 async def test_update_ticket():
     db = AsyncMock()
+    db.add_all = MagicMock()
     service = TicketService()
     ticket_update = TicketUpdate(status="Resolved", resolution_notes="Done")
-    db_ticket = MagicMock()
-    service.get_ticket = AsyncMock(return_value=db_ticket)
-    db.commit = AsyncMock()
-    db.refresh = AsyncMock()
+    db_ticket = MagicMock(status=TicketStatus.RESOLVED, agent_id=None)
+    db.execute = AsyncMock(return_value=returning_result(db_ticket))
     result = await service.update_ticket(db, "ticket123", ticket_update)
-    assert result is not None
+    assert result is db_ticket
+    db.commit.assert_awaited_once()
+    db.refresh.assert_not_awaited()
+    update_sql, counters_sql = executed_sql(db)
+    assert "UPDATE tickets" in update_sql and "RETURNING" in update_sql
+    assert counters_sql.startswith("INSERT INTO ticket_counters")
+
+@pytest.mark.asyncio
+async def test_update_ticket_folds_assignee_into_where():
+    db = AsyncMock()
+    db.add_all = MagicMock()
+    service = TicketService()
+    db.execute = AsyncMock(return_value=returning_result(None))
+    result = await service.update_ticket(db, "ticket123", TicketUpdate(resolution_notes="Done"), agent_id="agent123")
+    assert result is None
+    assert "tickets.agent_id = " in str(db.execute.await_args.args[0])
+    db.execute.assert_awaited_once()
+    db.commit.assert_not_awaited()
 
 @pytest.mark.asyncio
 async def test_assign_ticket():
     db = AsyncMock()
+    db.add_all = MagicMock()
     service = TicketService()
-    db_ticket = MagicMock()
-    service.get_ticket = AsyncMock(return_value=db_ticket)
-    db.commit = AsyncMock()
-    db.refresh = AsyncMock()
+    db_ticket = MagicMock(status=TicketStatus.OPEN, agent_id="agent123")
+    db.execute = AsyncMock(return_value=returning_result(db_ticket))
     result = await service.assign_ticket(db, "ticket123", "agent123")
-    assert result.agent_id == "agent123"
\ No newline at end of file
+    assert result.agent_id == "agent123"
+    assert len(executed_sql(db)) == 2
+    db.commit.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_create_tickets_uses_one_insert():
+    db = AsyncMock()
+    db.add_all = MagicMock()
+    service = TicketService()
+    result = MagicMock()
+    db_tickets = [MagicMock(id=f"ticket{i}", status=TicketStatus.OPEN, agent_id=None) for i in (1, 2)]
+    result.scalars.return_value.all.return_value = db_tickets
+    db.execute = AsyncMock(return_value=result)
+    tickets = [TicketCreate(title="A", description="a"), TicketCreate(title="B", description="b")]
+    created = await service.create_tickets(db, tickets, "user123")
+    assert created == db_tickets
+    insert_call, counters_call = db.execute.await_args_list
+    assert counters_call.args[0].compile().params["count_m0"] == 2
+    rows = insert_call.args[1]
+    assert [row["customer_id"] for row in rows] == ["user123", "user123"]
+    db.commit.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_bulk_update_groups_identical_changes():
+    db = AsyncMock()
+    db.add_all = MagicMock()
+    service = TicketService()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    db.execute = AsyncMock(return_value=result)
+    await service.bulk_update_tickets(db, {
+        "t1": {"status": "Closed"},
+        "t2": {"status": "Closed"},
+        "t3": {"agent_id": "agent123"},
+    })
+    assert db.execute.await_count == 2
+    db.commit.assert_awaited_once()
+
+def test_bulk_update_item_rejects_null_status():
+    with pytest.raises(ValidationError):
+        TicketBulkUpdateItem.model_validate({"id": "t1", "status": None})
+    item = TicketBulkUpdateItem.model_validate({"id": "t1", "agent_id": None})
+    assert item.model_dump(exclude_unset=True, exclude={"id"}) == {"agent_id": None}
@@ -0,0 +1,77 @@
+import base64
+import httpx
+import json
+import pytest
+import time
+from fastapi import Depends, FastAPI
+from unittest.mock import patch
+from app.config.dependencies import get_current_user
+from app.security.auth import auth_service
+from app.security.tokens import InvalidToken, JoseBackend, TokenVerifier
+
+def make_verifier(**kwargs):
+    options = dict(keys={"k1": "secret-1"}, active_kid="k1", default_key="legacy", backend=JoseBackend())
+    options.update(kwargs)
+    return TokenVerifier(**options)
+
+def test_rotation_keeps_old_tokens_valid():
+    verifier = make_verifier()
+    legacy = JoseBackend().encode({"email": "a@example.com", "exp": time.time() + 60}, "legacy", "HS256", None)
+    old = verifier.sign({"email": "b@example.com", "exp": time.time() + 60})
+    verifier.add_key("k2", "secret-2")
+    verifier.active_kid = "k2"
+    new = verifier.sign({"email": "c@example.com", "exp": time.time() + 60})
+    assert [verifier.verify(token)["email"] for token in (legacy, old, new)] == ["a@example.com", "b@example.com", "c@example.com"]
+
+    verifier.remove_key("k1")
+    with pytest.raises(InvalidToken):
+        verifier.verify(old)
+    assert verifier.verify(new)["email"] == "c@example.com"
+
+def test_verified_tokens_are_cached_until_exp():
+    now = [time.time()]
+    verifier = make_verifier(clock=lambda: now[0])
+    token = verifier.sign({"email": "a@example.com", "exp": now[0] + 60})
+    verifier.verify(token)
+    with patch.object(verifier.backend, "decode", side_effect=AssertionError("not cached")):
+        assert verifier.verify(token)["email"] == "a@example.com"
+    now[0] += 61
+    with patch.object(verifier.backend, "decode", side_effect=InvalidToken("expired")):
+        with pytest.raises(InvalidToken):
+            verifier.verify(token)
+
+def test_rejects_unknown_kid_and_tampering():
+    verifier = make_verifier()
+    other = make_verifier(keys={"k9": "secret-9"}, active_kid="k9")
+    with pytest.raises(InvalidToken):
+        verifier.verify(other.sign({"email": "a@example.com", "exp": time.time() + 60}))
+    header, _, signature = verifier.sign({"email": "a@example.com", "exp": time.time() + 60}).split(".")
+    forged_claims = verifier.sign({"email": "admin@example.com", "exp": time.time() + 60}).split(".")[1]
+    with pytest.raises(InvalidToken):
+        verifier.verify(".".join([header, forged_claims, signature]))
+
+def test_backend_name_is_loaded_on_first_use():
+    verifier = make_verifier(backend="jose")
+    assert verifier._backend == "jose"
+    verifier.verify(verifier.sign({"email": "a@example.com", "exp": time.time() + 60}))
+    assert isinstance(verifier.backend, JoseBackend)
+    with pytest.raises(ValueError):
+        make_verifier(backend="nope")
+
+@pytest.mark.asyncio
+async def test_non_string_kid_is_unauthorized(monkeypatch):
+    monkeypatch.setattr(auth_service, "tokens", make_verifier())
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(current_user=Depends(get_current_user)):
+        return {}
+
+    _, claims, signature = auth_service.tokens.sign({"email": "a@example.com", "exp": time.time() + 60}).split(".")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for kid in (["k1"], {"k": 1}, 1):
+            header = base64.urlsafe_b64encode(json.dumps({"alg": "HS256", "kid": kid}).encode()).rstrip(b"=").decode()
+            token = ".".join([header, claims, signature])
+            response = await client.get("/me", headers={"Authorization": f"Bearer {token}"})
+            assert response.status_code == 401